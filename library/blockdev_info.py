@@ -0,0 +1,144 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: blockdev_info
+short_description: Get information about block devices from the device inventory cache
+version_added: "2.5"
+description:
+    - "This module returns kernel name, file system signature, holders and
+       symlinks of the given block devices. The information comes from the
+       device inventory cache which is only rescanned for the devices that
+       changed since it was written."
+    - "With probe the given devices are probed directly once udev has
+       settled, use it right after creating a signature on a device."
+options:
+    devices:
+        description:
+            - List of block device paths
+        required: true
+    path:
+        description:
+            - Path to the inventory cache file
+        required: false
+        default: /run/storage-role/inventory.json
+    probe:
+        description:
+            - Probe the given devices directly instead of trusting the cache
+        type: bool
+        default: false
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Get file system type of a volume
+  blockdev_info:
+    devices: ["/dev/mapper/vg-lv"]
+  register: info
+
+- name: Get UUID of a just created file system
+  blockdev_info:
+    devices: ["/dev/mapper/vg-lv"]
+    probe: true
+  register: info
+'''
+
+RETURN = '''
+info:
+    description: Information about the devices keyed by the given paths
+    type: dict
+    contains:
+        exists:
+            description: Whether the device exists
+            type: bool
+        name:
+            description: Kernel name of the device
+            type: str
+        fstype:
+            description: Type of the signature found on the device
+            type: str
+        uuid:
+            description: UUID of the signature found on the device
+            type: str
+        label:
+            description: Label of the signature found on the device
+            type: str
+        holders:
+            description: Kernel names of the holders of the device
+            type: list
+        symlinks:
+            description: Symlinks pointing to the device
+            type: list
+rescanned:
+    description: Kernel names of the devices that were probed during this run
+    type: list
+'''
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.inventory import INVENTORY_PATH, get_inventory
+
+
+def device_info(inventory, path):
+    info = dict(exists=False, name="", fstype="", uuid="", label="", holders=[], symlinks=[])
+    if not os.path.exists(path):
+        return info
+
+    name = os.path.basename(os.path.realpath(path))
+    device = inventory['devices'].get(name)
+    if device is None:
+        return info
+
+    signature = device['signature'] or dict()
+    info.update(exists=True,
+                name=name,
+                fstype=signature.get('TYPE', ""),
+                uuid=signature.get('UUID', ""),
+                label=signature.get('LABEL', ""),
+                holders=device['holders'],
+                symlinks=device['symlinks'])
+    return info
+
+
+def run_module():
+    module_args = dict(
+        devices=dict(type='list', required=True),
+        path=dict(type='str', required=False, default=INVENTORY_PATH),
+        probe=dict(type='bool', required=False, default=False),
+    )
+
+    result = dict(
+        changed=False,
+        info=dict(),
+        rescanned=[]
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    probe = None
+    if module.params['probe']:
+        probe = [os.path.basename(os.path.realpath(path))
+                 for path in module.params['devices'] if os.path.exists(path)]
+
+    inventory, result['rescanned'] = get_inventory(module.run_command, module.params['path'], probe)
+    for path in module.params['devices']:
+        result['info'][path] = device_info(inventory, path)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: blockdev_topology
+short_description: Get the block device stack above and below devices
+version_added: "2.5"
+description:
+    - "This module builds the complete holder/slave graph of all block
+       devices (disk, partition, md, dm/LUKS, LV) in a single sysfs scan,
+       annotated with mount points and LVM PV membership. For each of the
+       given devices it returns its ancestors and descendants, the order
+       in which the stack on top of it has to be torn down and whether it
+       is in use."
+options:
+    devices:
+        description:
+            - List of block device paths or kernel names
+        required: false
+        default: []
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Check whether the pool disks are in use
+  blockdev_topology:
+    devices: ["/dev/sdb", "/dev/sdc"]
+  register: topology
+'''
+
+RETURN = '''
+graph:
+    description: All block devices keyed by kernel name
+    type: dict
+    contains:
+        holders:
+            description: Kernel names of the devices built directly on top of the
+                         device (holders and partitions)
+            type: list
+        slaves:
+            description: Kernel names of the devices the device is built directly
+                         on (slaves and the disk of a partition)
+            type: list
+        mounts:
+            description: Mount points of the device
+            type: list
+        vg:
+            description: Name of the VG the device is a PV of
+            type: str
+devices:
+    description: Information about the requested devices keyed by the given paths
+    type: dict
+    contains:
+        name:
+            description: Kernel name of the device
+            type: str
+        ancestors:
+            description: Devices the device is built on
+            type: list
+        descendants:
+            description: Devices built on top of the device
+            type: list
+        teardown:
+            description: The device and its descendants, top of the stack first
+            type: list
+        mounts:
+            description: Mount points of the device and of its descendants
+            type: list
+        in_use:
+            description: Whether the device is mounted, held or a PV
+            type: bool
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.blockdev_graph import BlockDeviceGraph
+
+
+def device_info(graph, device):
+    name = graph.name(device)
+    return dict(name=name,
+                ancestors=graph.ancestors(name),
+                descendants=graph.descendants(name),
+                teardown=graph.teardown_order([name]),
+                mounts=graph.stack_mounts(name),
+                in_use=graph.in_use(name))
+
+
+def run_module():
+    module_args = dict(
+        devices=dict(type='list', required=False, default=[]),
+    )
+
+    result = dict(
+        changed=False,
+        graph=dict(),
+        devices=dict()
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    graph = BlockDeviceGraph.scan(module.run_command)
+    for name in graph.devices:
+        result['graph'][name] = dict(holders=graph.children(name),
+                                     slaves=graph.parents(name),
+                                     mounts=graph.mounts.get(name, []),
+                                     vg=graph.pvs.get(name, ""))
+
+    try:
+        for device in module.params['devices']:
+            result['devices'][device] = device_info(graph, device)
+    except KeyError as e:
+        module.fail_json(msg=e.args[0], **result)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: blockdev_wipe
+short_description: Wipe block devices for reuse
+version_added: "2.5"
+description:
+    - "Module wipes the given block devices concurrently. Depending on the
+       method and on what the device supports (queue/discard_max_bytes and
+       queue/write_zeroes_max_bytes) the whole device is discarded
+       (BLKDISCARD) or zeroed out (BLKZEROOUT) by the device itself.
+       Otherwise only the regions at the start and at the end of the device
+       where signatures (partition tables, RAID and LVM metadata, file
+       system superblocks) live are overwritten with zeroes."
+    - "Devices are opened exclusively, devices in use are not touched."
+options:
+    devices:
+        description:
+            - List of block device paths
+        required: true
+    method:
+        description:
+            - Wipe method. C(auto) discards the device if it supports that
+              and falls back to signatures otherwise. It never zeroes out
+              whole devices, HDDs with WRITE SAME report write zeroes
+              support but still write every block. Explicitly requested
+              discard and zeroout fall back to signatures if the device
+              does not support them.
+        choices: [auto, discard, zeroout, signatures]
+        default: auto
+    signature_size:
+        description:
+            - Size of the regions at the start and at the end of the device
+              zeroed by the signatures method
+        default: 1 MiB
+    parallel:
+        description:
+            - Maximum number of devices wiped concurrently
+        type: int
+        default: 16
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Reclaim the disks of a removed pool
+  blockdev_wipe:
+    devices: ["/dev/sdb", "/dev/sdc"]
+    method: auto
+'''
+
+RETURN = '''
+devices:
+    description: Per-device results keyed by device path
+    type: dict
+    contains:
+        method:
+            description: Method used to wipe the device
+            type: str
+        size:
+            description: Size of the device in bytes
+            type: int
+        error:
+            description: Error message if wiping the device failed
+            type: str
+'''
+
+import fcntl
+import os
+import stat
+import struct
+from multiprocessing.pool import ThreadPool
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.size import Size
+
+SYS_CLASS_BLOCK = "/sys/class/block"
+
+# from linux/fs.h
+BLKRRPART = 0x125f
+BLKGETSIZE64 = 0x80081272
+BLKDISCARD = 0x1277
+BLKZEROOUT = 0x127f
+
+METHODS = ['auto', 'discard', 'zeroout', 'signatures']
+ZERO_CHUNK = 64 * 1024
+
+
+def device_caps(device):
+    """Return (discard_max_bytes, write_zeroes_max_bytes) of the device."""
+    kname = os.path.basename(os.path.realpath(device))
+    caps = []
+    for attr in ("discard_max_bytes", "write_zeroes_max_bytes"):
+        try:
+            with open("%s/%s/queue/%s" % (SYS_CLASS_BLOCK, kname, attr)) as f:
+                caps.append(int(f.read().strip()))
+        except (IOError, OSError, ValueError):
+            caps.append(0)
+    return tuple(caps)
+
+
+def choose_method(method, discard_max, write_zeroes_max):
+    if method == 'zeroout' and write_zeroes_max:
+        return 'zeroout'
+    if method in ('auto', 'discard') and discard_max:
+        return 'discard'
+    return 'signatures'
+
+
+def device_size(fd):
+    if stat.S_ISREG(os.fstat(fd).st_mode):
+        return os.fstat(fd).st_size
+    buf = fcntl.ioctl(fd, BLKGETSIZE64, struct.pack('Q', 0))
+    return struct.unpack('Q', buf)[0]
+
+
+def signature_regions(size, region_size):
+    """Return list of (offset, length) regions holding the signatures."""
+    if size <= 2 * region_size:
+        return [(0, size)]
+    return [(0, region_size), (size - region_size, region_size)]
+
+
+def zero_region(fd, offset, length):
+    zeroes = b'\0' * ZERO_CHUNK
+    os.lseek(fd, offset, os.SEEK_SET)
+    while length > 0:
+        length -= os.write(fd, zeroes[:min(length, ZERO_CHUNK)])
+
+
+def wipe_device(device, method, region_size):
+    """Wipe the device using the given method, returns dict with results."""
+    fd = os.open(device, os.O_RDWR | os.O_EXCL)
+    try:
+        size = device_size(fd)
+        if method == 'zeroout':
+            fcntl.ioctl(fd, BLKZEROOUT, struct.pack('QQ', 0, size))
+        else:
+            if method == 'discard':
+                fcntl.ioctl(fd, BLKDISCARD, struct.pack('QQ', 0, size))
+            # discarded blocks are not guaranteed to read back as zeroes
+            for offset, length in signature_regions(size, region_size):
+                zero_region(fd, offset, length)
+            os.fsync(fd)
+
+        if stat.S_ISBLK(os.fstat(fd).st_mode):
+            try:
+                # let the kernel know the partition table is gone
+                fcntl.ioctl(fd, BLKRRPART)
+            except (IOError, OSError):
+                pass
+    finally:
+        os.close(fd)
+
+    return dict(method=method, size=size)
+
+
+def wipe_all(devices, method, region_size, parallel, check_mode=False):
+    """Wipe all the devices concurrently, returns per-device results."""
+    def wipe(device):
+        chosen = choose_method(method, *device_caps(device))
+        if check_mode:
+            return device, dict(method=chosen)
+        try:
+            return device, wipe_device(device, chosen, region_size)
+        except (IOError, OSError) as e:
+            return device, dict(method=chosen, error=str(e))
+
+    if not devices:
+        return dict()
+
+    pool = ThreadPool(max(1, min(parallel, len(devices))))
+    try:
+        return dict(pool.map(wipe, devices))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def run_module():
+    module_args = dict(
+        devices=dict(type='list', required=True),
+        method=dict(type='str', default='auto', choices=METHODS),
+        signature_size=dict(type='str', default='1 MiB'),
+        parallel=dict(type='int', default=16),
+    )
+
+    result = dict(
+        changed=False,
+        devices=dict()
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    devices = module.params['devices']
+    missing = [d for d in devices if not os.path.exists(d)]
+    if missing:
+        module.fail_json(msg="Devices do not exist: %s" % ", ".join(missing))
+
+    try:
+        region_size = Size(module.params['signature_size']).bytes
+    except ValueError as e:
+        module.fail_json(msg=str(e))
+
+    result['devices'] = wipe_all(devices, module.params['method'], region_size,
+                                 module.params['parallel'], module.check_mode)
+    result['changed'] = bool(devices)
+
+    failed = dict((d, r['error']) for d, r in result['devices'].items() if 'error' in r)
+    if failed:
+        module.fail_json(msg="Failed to wipe devices: %s" % failed, **result)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
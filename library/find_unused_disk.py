@@ -9,7 +9,8 @@ description:
     - Disks that meet all conditions are considered 'empty' and returned (using kernel device name) in a list.
         - 1. No known signatures exist on the disk, with the exception of partition tables.
         - 2. If there is a partition table on the disk, it contains no partitions.
-        - 3. The disk has no holders to eliminate the possibility of it being a multipath or dmraid member device.
+        - 3. Nothing is built on top of the disk (holders, partitions), it is not mounted, used as swap or an LVM PV,
+             to eliminate the possibility of it being a multipath or dmraid member device.
         - 4. Device can be opened with exclusive access to make sure no other software is using it.
     - If no disks meet all criteria, "Unable to find unused disk" will be returned.
     - Number of returned disks defaults to first 10, but can be specified with 'max_return' argument.
@@ -56,7 +57,8 @@ disk_name:
 import os
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils import facts
+from ansible.module_utils.blockdev_graph import BlockDeviceGraph, read_mounts, read_pvs
+from ansible.module_utils.inventory import get_inventory
 
 
 def no_signature(run_command, disk_path):
@@ -65,12 +67,6 @@ def no_signature(run_command, disk_path):
     return not 'UUID' in signatures[1]
 
 
-def no_holders(disk):
-    """Return true if the disk has no holders."""
-    holders = os.listdir('/sys/class/block/' + disk + '/holders/')
-    return len(holders) == 0
-
-
 def can_open(disk_path):
     """Return true if the device can be opened with exclusive access."""
     try:
@@ -96,13 +92,22 @@ def run_module():
         supports_check_mode=True
     )
 
-    ansible_facts = facts.ansible_facts(module)
     run_command = module.run_command
-    for disk in ansible_facts['devices'].keys():
-        # If partition table exists but contains no partitions -> no partitions.
-        no_partitions = not bool(ansible_facts['devices'][disk]['partitions'])
-
-        if no_partitions and no_signature(run_command, '/dev/' + disk) and no_holders(disk) and can_open('/dev/' + disk):
+    inventory, rescanned = get_inventory(run_command)
+    devices = inventory['devices']
+    graph = BlockDeviceGraph(devices, read_mounts(devices), read_pvs(run_command))
+    for disk in sorted(devices.keys()):
+        info = devices[disk]
+        if info['partition']:
+            continue
+
+        if info['signature'] is None:
+            unsigned = no_signature(run_command, '/dev/' + disk)
+        else:
+            unsigned = 'UUID' not in info['signature']
+
+        # a partition table without partitions does not count
+        if unsigned and not graph.in_use(disk) and can_open('/dev/' + disk):
             result['disks'].append(disk)
             if len(result['disks']) >= module.params['max_return']:
                 break
@@ -0,0 +1,372 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: fs_profile
+short_description: Expand a workload profile into mkfs and mount options
+version_added: "2.5"
+description:
+    - "Module accepts a workload profile name and a file system type and
+       produces the matching mkfs and mount options. Options specified by
+       the user take precedence over the ones supplied by the profile."
+    - "The device's queue/rotational flag and size are taken into account
+       when choosing the allocation geometry. For xfs the number of
+       allocation groups and the internal log size are fitted to the device
+       (AGs between 16 MiB and 1 TiB, the log has to fit into one AG) or
+       left to mkfs.xfs if the profile geometry does not fit."
+    - "If the stripe geometry of an underlying RAID array is given, the file
+       system is aligned to it (xfs su/sw, ext4 stride/stripe_width)."
+options:
+    profile:
+        description:
+            - Name of the workload profile. If not specified, only the stripe
+              geometry is applied.
+        required: false
+        choices: [database, streaming, small-files, scratch]
+    fs_type:
+        description:
+            - File system type the options are generated for
+        required: true
+    device:
+        description:
+            - Path to the block device the file system lives on. Used to
+              determine whether the device is rotational and its size.
+        required: false
+    fs_create_options:
+        description:
+            - User-specified mkfs options
+        required: false
+        default: ""
+    mount_options:
+        description:
+            - User-specified mount options
+        required: false
+        default: "defaults"
+    stripe_unit:
+        description:
+            - RAID chunk size in bytes, 0 if the device is not striped
+        type: int
+        default: 0
+    stripe_count:
+        description:
+            - Number of data disks in a RAID stripe
+        type: int
+        default: 0
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Get options for a database volume
+  fs_profile:
+    profile: database
+    fs_type: xfs
+    device: /dev/mapper/vg-db
+
+- name: Align a file system to a RAID 6 array of 6 disks with 256 KiB chunks
+  fs_profile:
+    fs_type: ext4
+    stripe_unit: 262144
+    stripe_count: 4
+'''
+
+RETURN = '''
+fs_create_options:
+    description: Resolved mkfs options
+    type: str
+mount_options:
+    description: Resolved mount options
+    type: str
+rotational:
+    description: Whether the device was detected as rotational
+    type: bool
+'''
+
+import os
+import shlex
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves import shlex_quote
+from ansible.module_utils.size import Size
+
+SYS_CLASS_BLOCK = "/sys/class/block"
+
+# mkfs options are (flag, suboption, value) triples so that user options
+# setting the same flag/suboption can override the profile ones
+PROFILES = {
+    'xfs': {
+        'database': dict(mkfs=[('-i', 'size', '512'), ('-l', 'size', '128m')],
+                         mount=['noatime', 'logbufs=8', 'logbsize=256k']),
+        'streaming': dict(mkfs=[('-l', 'size', '128m')],
+                          mount=['noatime', 'logbsize=256k', 'largeio', 'allocsize=64m']),
+        'small-files': dict(mkfs=[('-i', 'size', '512'), ('-i', 'maxpct', '50')],
+                            mount=['noatime', 'logbufs=8', 'logbsize=256k']),
+        'scratch': dict(mkfs=[('-l', 'lazy-count', '1')],
+                        mount=['noatime', 'nodiratime', 'logbsize=256k']),
+    },
+    'ext4': {
+        'database': dict(mkfs=[('-i', None, '65536'), ('-I', None, '256')],
+                         mount=['noatime', 'data=ordered', 'commit=5']),
+        'streaming': dict(mkfs=[('-i', None, '1048576')],
+                          mount=['noatime', 'commit=60']),
+        'small-files': dict(mkfs=[('-i', None, '4096'), ('-I', None, '256')],
+                            mount=['noatime']),
+        'scratch': dict(mkfs=[('-i', None, '65536')],
+                        mount=['noatime', 'barrier=0', 'commit=120']),
+    },
+}
+
+# additional options depending on the device's queue/rotational flag
+ROTATIONAL = {
+    'xfs': {True: dict(mkfs=[], mount=[]),
+            False: dict(mkfs=[], mount=[])},
+    'ext4': {True: dict(mkfs=[('-G', None, '64')], mount=[]),
+             False: dict(mkfs=[], mount=[])},
+}
+
+# preferred number of xfs allocation groups, few for HDDs to limit seeking,
+# many for SSDs to allow parallel allocation
+XFS_AGCOUNT = {True: 4, False: 32}
+XFS_AG_MIN = 16 * 1024 ** 2
+XFS_AG_MAX = 1024 ** 4
+
+# suboptions mkfs refuses to get together with the given one, a user
+# option overrides the profile ones it excludes too
+EXCLUSIVE_SUBOPTS = {
+    ('-d', 'agcount'): ['agsize'],
+    ('-d', 'agsize'): ['agcount'],
+    # the stripe is given either by su/sw in bytes or by sunit/swidth in
+    # 512 byte sectors, mkfs.xfs needs both values of the same pair
+    ('-d', 'su'): ['sunit', 'swidth', 'noalign'],
+    ('-d', 'sw'): ['sunit', 'swidth', 'noalign'],
+}
+
+# flags taking a comma separated list of suboptions, mkfs only uses the last
+# occurrence of such a flag
+SUBOPT_FLAGS = {
+    'xfs': ['-b', '-d', '-i', '-l', '-m', '-n', '-r', '-s'],
+    'ext4': ['-E', '-O'],
+}
+
+EXT_BLOCK_SIZE = 4096
+
+
+def is_rotational(device):
+    """Return the value of the queue/rotational flag of the device.
+
+    Devices without the flag (or nonexistent devices) are considered to be
+    non-rotational.
+    """
+    if not device or not os.path.exists(device):
+        return False
+
+    kname = os.path.basename(os.path.realpath(device))
+    try:
+        with open("%s/%s/queue/rotational" % (SYS_CLASS_BLOCK, kname)) as f:
+            return f.read().strip() == "1"
+    except (IOError, OSError):
+        return False
+
+
+def device_size(device):
+    """Return size of the device in bytes, 0 if unknown."""
+    if not device or not os.path.exists(device):
+        return 0
+
+    kname = os.path.basename(os.path.realpath(device))
+    try:
+        with open("%s/%s/size" % (SYS_CLASS_BLOCK, kname)) as f:
+            return int(f.read().strip()) * 512
+    except (IOError, OSError, ValueError):
+        return 0
+
+
+def xfs_geometry(size, rotational, log_size=0):
+    """Return (agcount, log size) fitting a device of the given size.
+
+    None means the value is left to mkfs.xfs. Each AG has to be between
+    16 MiB and 1 TiB and the internal log has to fit into one AG together
+    with the AG headers, so AGs are kept at least twice the log size.
+    """
+    if not size:
+        return None, None
+
+    if log_size and size // (2 * log_size) < 2:
+        # the log does not fit into an AG of a reasonable geometry
+        log_size = 0
+
+    agcount = min(XFS_AGCOUNT[rotational], size // max(XFS_AG_MIN, 2 * log_size))
+    agcount = max(agcount, size // XFS_AG_MAX + 1)
+    return (agcount if agcount >= 2 else None), (log_size or None)
+
+
+def _fit_xfs_geometry(opts, size, rotational):
+    """Replace the profile log size with one fitting the device, add agcount."""
+    log = next((value for flag, subopt, value in opts if (flag, subopt) == ('-l', 'size')), None)
+    agcount, log_size = xfs_geometry(size, rotational, Size(log).bytes if log else 0)
+
+    fitted = [o for o in opts if o[:2] != ('-l', 'size') or log_size]
+    if agcount:
+        fitted.append(('-d', 'agcount', '%d' % agcount))
+    return fitted
+
+
+def _parse_mkfs_options(opts):
+    """Return set of (flag, suboption) pairs specified in mkfs option string."""
+    parsed = set()
+    tokens = shlex.split(opts)
+    for idx, token in enumerate(tokens):
+        if not token.startswith('-'):
+            continue
+        parsed.add((token, None))
+        if idx + 1 < len(tokens) and not tokens[idx + 1].startswith('-'):
+            for subopt in tokens[idx + 1].split(','):
+                parsed.add((token, subopt.split('=')[0]))
+    return parsed
+
+
+def _split_mkfs_options(opts):
+    """Return list of [flag, argument] pairs, argument is None for flags without one."""
+    entries = []
+    tokens = shlex.split(opts)
+    idx = 0
+    while idx < len(tokens):
+        if tokens[idx].startswith('-') and idx + 1 < len(tokens) and not tokens[idx + 1].startswith('-'):
+            entries.append([tokens[idx], tokens[idx + 1]])
+            idx += 2
+        else:
+            entries.append([tokens[idx], None])
+            idx += 1
+    return entries
+
+
+def merge_mkfs_options(profile_opts, user_opts, fs_type):
+    """Merge profile mkfs options with the user ones, user options win.
+
+    Arguments of flags taking suboption lists are joined into a single
+    argument (e.g. "-i size=512,maxpct=50" or "-E stride=128,nodiscard"),
+    both the profile and the user ones.
+    """
+    user_set = _parse_mkfs_options(user_opts)
+    list_flags = SUBOPT_FLAGS.get(fs_type, [])
+
+    merged = []  # list of [flag, argument]
+
+    def add(flag, arg):
+        entry = None
+        if flag in list_flags and arg is not None:
+            entry = next((e for e in merged if e[0] == flag), None)
+        if entry:
+            entry[1] += "," + arg
+        else:
+            merged.append([flag, arg])
+
+    for flag, subopt, value in profile_opts:
+        if (flag, subopt) in user_set or \
+                any((flag, other) in user_set for other in EXCLUSIVE_SUBOPTS.get((flag, subopt), [])):
+            continue
+        add(flag, "%s=%s" % (subopt, value) if subopt else value)
+
+    for flag, arg in _split_mkfs_options(user_opts):
+        add(flag, arg)
+
+    return " ".join(shlex_quote(flag) if arg is None else "%s %s" % (shlex_quote(flag), shlex_quote(arg))
+                    for flag, arg in merged)
+
+
+def merge_mount_options(profile_opts, user_opts):
+    """Merge profile mount options with the user ones, user options win."""
+    user_list = [o for o in user_opts.split(',') if o and o != "defaults"]
+    user_names = set(o.split('=')[0] for o in user_list)
+
+    result = [o for o in profile_opts if o.split('=')[0] not in user_names]
+    result.extend(user_list)
+    return ",".join(result) if result else "defaults"
+
+
+def stripe_options(fs_type, stripe_unit, stripe_count):
+    """Return mkfs options aligning the file system to a RAID stripe."""
+    if not stripe_unit or not stripe_count:
+        return []
+    if fs_type == 'xfs':
+        return [('-d', 'su', '%dk' % (stripe_unit // 1024)), ('-d', 'sw', '%d' % stripe_count)]
+    stride = stripe_unit // EXT_BLOCK_SIZE
+    if not stride:
+        return []
+    return [('-E', 'stride', '%d' % stride), ('-E', 'stripe_width', '%d' % (stride * stripe_count))]
+
+
+def resolve_profile(profile, fs_type, rotational, fs_create_options="", mount_options="defaults",
+                    stripe_unit=0, stripe_count=0, size=0):
+    """Return (mkfs options, mount options) for the given profile.
+
+    size is the size of the device in bytes, 0 if unknown.
+    """
+    if fs_type not in PROFILES:
+        # no tuning known for this file system type, keep what user gave us
+        return fs_create_options, mount_options
+
+    mkfs_opts = []
+    mount_opts = []
+    if profile:
+        base = PROFILES[fs_type][profile]
+        extra = ROTATIONAL[fs_type][rotational]
+        mkfs_opts = base['mkfs'] + extra['mkfs']
+        mount_opts = base['mount'] + extra['mount']
+        if fs_type == 'xfs':
+            mkfs_opts = _fit_xfs_geometry(mkfs_opts, size, rotational)
+    mkfs_opts = mkfs_opts + stripe_options(fs_type, stripe_unit, stripe_count)
+
+    mkfs = merge_mkfs_options(mkfs_opts, fs_create_options, fs_type)
+    mount = merge_mount_options(mount_opts, mount_options)
+    return mkfs, mount
+
+
+def run_module():
+    module_args = dict(
+        profile=dict(type='str', required=False,
+                     choices=['database', 'streaming', 'small-files', 'scratch']),
+        fs_type=dict(type='str', required=True),
+        device=dict(type='str', required=False),
+        fs_create_options=dict(type='str', required=False, default=""),
+        mount_options=dict(type='str', required=False, default="defaults"),
+        stripe_unit=dict(type='int', required=False, default=0),
+        stripe_count=dict(type='int', required=False, default=0),
+    )
+
+    result = dict(
+        changed=False
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    rotational = is_rotational(module.params['device'])
+    mkfs, mount = resolve_profile(module.params['profile'],
+                                  module.params['fs_type'],
+                                  rotational,
+                                  module.params['fs_create_options'] or "",
+                                  module.params['mount_options'] or "defaults",
+                                  module.params['stripe_unit'],
+                                  module.params['stripe_count'],
+                                  device_size(module.params['device']))
+
+    result['rotational'] = rotational
+    result['fs_create_options'] = mkfs
+    result['mount_options'] = mount
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: lvm_plan
+short_description: Plan sizes and placement of the volumes of an LVM pool
+version_added: "2.5"
+description:
+    - "Module resolves the sizes of all volumes of a pool to whole extents
+       and checks that they fit into the volume group before any of them is
+       created or resized. New space is placed on the physical volumes with
+       the most free extents to balance usage across the disks."
+    - "Sizes can be absolute (eg. '10 GiB'), a percentage of the volume group
+       size ('20%' or '20%VG'), a percentage of the free space at the time of
+       planning ('50%FREE') or 'remaining' for whatever is left once all the
+       other volumes are placed (at most one volume per pool)."
+    - "Thin volumes are not planned, their size is virtual. A thin pool
+       (type 'thinpool') is planned like any other volume, a new one also
+       needs space for its metadata LV and the spare metadata LV. Unless
+       given, the metadata size is 64 bytes per 64 KiB of data (between
+       4 MiB and 16 GiB) and is returned so that the pool can be created
+       with exactly that size."
+options:
+    vg:
+        description:
+            - Name of the volume group
+        required: true
+    volumes:
+        description:
+            - List of volume dicts with name, size, type and state keys,
+              thin pools may have a metadata_size key
+        required: true
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Plan the pool volumes
+  lvm_plan:
+    vg: data
+    volumes:
+      - name: db
+        size: 40%
+      - name: logs
+        size: 10 GiB
+      - name: scratch
+        size: remaining
+'''
+
+RETURN = '''
+volumes:
+    description: Planned volumes keyed by volume name
+    type: dict
+    contains:
+        bytes:
+            description: Planned size in bytes
+            type: int
+        extents:
+            description: Planned size in extents
+            type: int
+        current:
+            description: Current size in bytes (0 for new volumes)
+            type: int
+        current_size:
+            description: Current size in human-readable form
+            type: str
+        grow:
+            description: Whether an existing volume is going to be extended
+            type: bool
+        size:
+            description: Planned size in human-readable form
+            type: str
+        lvm:
+            description: Planned size in format accepted by lvol
+            type: str
+        pvs:
+            description: Physical volumes the new space is placed on
+            type: list
+        metadata_size:
+            description: Metadata size of a thin pool in format accepted by
+                         lvcreate --poolmetadatasize
+            type: str
+extent_size:
+    description: Extent size of the volume group in bytes
+    type: int
+free:
+    description: Free space in the volume group in bytes before and after the plan
+    type: dict
+'''
+
+import math
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.size import Size
+
+PERCENT_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*%\s*(FREE|VG)?\s*$', re.IGNORECASE)
+REMAINING = "remaining"
+PLANNED_TYPES = ['lvm', 'thinpool']
+
+THIN_METADATA_MIN = 4 * 1024 ** 2
+THIN_METADATA_MAX = 16 * 1024 ** 3
+
+
+class PlanError(Exception):
+    pass
+
+
+def get_vg_info(run_cmd, vg):
+    """Return (extent size, extent count, free extent count) of the VG."""
+    rc, out, err = run_cmd(["vgs", "--noheadings", "--nosuffix", "--units", "b",
+                            "-o", "vg_extent_size,vg_extent_count,vg_free_count", vg])
+    if rc != 0:
+        raise PlanError("Failed to get information about volume group %s: %s" % (vg, err.strip()))
+    extent_size, count, free = out.split()
+    return int(extent_size), int(count), int(free)
+
+
+def get_lvs(run_cmd, vg):
+    """Return dict mapping LV names to their sizes in bytes."""
+    rc, out, err = run_cmd(["lvs", "--noheadings", "--nosuffix", "--units", "b",
+                            "-o", "lv_name,lv_size", vg])
+    if rc != 0:
+        raise PlanError("Failed to list logical volumes of %s: %s" % (vg, err.strip()))
+    return dict((name, int(size)) for name, size in (line.split() for line in out.splitlines() if line.strip()))
+
+
+def get_pv_free(run_cmd, vg):
+    """Return dict mapping PV names to their free extent counts."""
+    rc, out, err = run_cmd(["pvs", "--noheadings", "-o", "pv_name,pv_pe_count,pv_pe_alloc_count",
+                            "--select", "vg_name=%s" % vg])
+    if rc != 0:
+        raise PlanError("Failed to list physical volumes of %s: %s" % (vg, err.strip()))
+    pv_free = dict()
+    for line in out.splitlines():
+        if line.strip():
+            name, count, alloc = line.split()
+            pv_free[name] = int(count) - int(alloc)
+    return pv_free
+
+
+def requested_extents(size, extent_size, vg_extents, free_extents):
+    """Return number of extents requested by size spec or None for 'remaining'.
+
+    Absolute sizes are rounded up to whole extents, percentages down (same as
+    lvcreate does).
+    """
+    spec = str(size).strip()
+    if spec.lower() == REMAINING:
+        return None
+
+    m = PERCENT_RE.match(spec)
+    if m:
+        percent = float(m.group(1))
+        if percent > 100:
+            raise PlanError("Invalid percentage '%s'" % spec)
+        base = free_extents if (m.group(2) or "").upper() == "FREE" else vg_extents
+        return int(math.floor(base * percent / 100))
+
+    try:
+        size_bytes = Size(spec).bytes
+    except ValueError as e:
+        raise PlanError(str(e))
+    return int(math.ceil(float(size_bytes) / extent_size))
+
+
+def thin_metadata_extents(data_extents, extent_size, metadata_size=None):
+    """Return number of extents of the metadata LV of a thin pool."""
+    if metadata_size:
+        try:
+            size_bytes = Size(metadata_size).bytes
+        except ValueError as e:
+            raise PlanError(str(e))
+    else:
+        # 64 bytes of metadata per 64 KiB chunk of data
+        size_bytes = min(THIN_METADATA_MAX, max(THIN_METADATA_MIN, data_extents * extent_size // 1024))
+    return int(math.ceil(float(size_bytes) / extent_size))
+
+
+def place(needs, pv_free):
+    """Assign PVs to the requested extent counts.
+
+    needs is a list of (name, extents) pairs, pv_free a dict of PV free
+    extent counts which is updated. Largest requests are placed first, each
+    on the PV with the most free extents if it fits there, otherwise it is
+    spread over the PVs with the most free extents.
+    """
+    placement = dict()
+    for name, extents in sorted(needs, key=lambda n: (-n[1], n[0])):
+        if extents <= 0:
+            placement[name] = []
+            continue
+
+        by_free = sorted(pv_free, key=lambda pv: (-pv_free[pv], pv))
+        if pv_free[by_free[0]] >= extents:
+            pv_free[by_free[0]] -= extents
+            placement[name] = [by_free[0]]
+            continue
+
+        placement[name] = []
+        for pv in by_free:
+            if extents <= 0:
+                break
+            used = min(extents, pv_free[pv])
+            if used:
+                pv_free[pv] -= used
+                extents -= used
+                placement[name].append(pv)
+    return placement
+
+
+def plan_volumes(volumes, extent_size, vg_extents, free_extents, lvs, pv_free):
+    """Return dict of planned volumes keyed by name."""
+    planned = dict()
+    remaining = None
+    for volume in volumes:
+        if volume.get('state', 'present') != 'present' or volume.get('type', 'lvm') not in PLANNED_TYPES:
+            continue
+        if not volume.get('size'):
+            continue
+
+        name = volume['name']
+        extents = requested_extents(volume['size'], extent_size, vg_extents, free_extents)
+        if extents is None:
+            if remaining is not None:
+                raise PlanError("Only one volume can use the remaining space, found '%s' and '%s'" % (remaining, name))
+            remaining = name
+        elif extents == 0:
+            raise PlanError("Size '%s' of volume %s is smaller than one extent" % (volume['size'], name))
+
+        current = lvs.get(name, 0) // extent_size
+        planned[name] = dict(extents=extents, current=current, metadata=0)
+        if volume.get('type') == 'thinpool':
+            planned[name]['metadata'] = thin_metadata_extents(extents or free_extents, extent_size,
+                                                              volume.get('metadata_size'))
+            if current:
+                # existing pool, its metadata LVs are already allocated
+                planned[name]['reserved'] = 0
+            else:
+                # the metadata LV and the spare metadata LV
+                planned[name]['reserved'] = 2 * planned[name]['metadata']
+
+    needs = dict((name, max(0, p['extents'] - p['current']) + p.get('reserved', 0))
+                 for name, p in planned.items() if name != remaining)
+    needed = sum(needs.values())
+    if needed > free_extents:
+        raise PlanError("Volumes need %s more space but only %s is free" %
+                        (Size(needed * extent_size).get(), Size(free_extents * extent_size).get()))
+
+    if remaining is not None:
+        needs[remaining] = free_extents - needed
+        planned[remaining]['extents'] = planned[remaining]['current'] + needs[remaining] - \
+            planned[remaining].get('reserved', 0)
+        if planned[remaining]['extents'] <= 0:
+            raise PlanError("No space remaining for volume %s" % remaining)
+
+    placement = place(list(needs.items()), dict(pv_free))
+
+    result = dict()
+    for name, p in planned.items():
+        size_bytes = p['extents'] * extent_size
+        result[name] = dict(extents=p['extents'],
+                            bytes=size_bytes,
+                            current=p['current'] * extent_size,
+                            current_size=Size(p['current'] * extent_size).get(),
+                            grow=0 < p['current'] < p['extents'],
+                            size=Size(size_bytes).get(),
+                            lvm="%dk" % (size_bytes // 1024),
+                            pvs=placement[name])
+        if p['metadata']:
+            result[name]['metadata_size'] = "%dk" % (p['metadata'] * extent_size // 1024)
+    return result, sum(needs.values())
+
+
+def run_module():
+    module_args = dict(
+        vg=dict(type='str', required=True),
+        volumes=dict(type='list', required=True),
+    )
+
+    result = dict(
+        changed=False,
+        volumes=dict()
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    vg = module.params['vg']
+    try:
+        extent_size, vg_extents, free_extents = get_vg_info(module.run_command, vg)
+        lvs = get_lvs(module.run_command, vg)
+        pv_free = get_pv_free(module.run_command, vg)
+        result['volumes'], used = plan_volumes(module.params['volumes'], extent_size,
+                                               vg_extents, free_extents, lvs, pv_free)
+    except PlanError as e:
+        module.fail_json(msg=str(e), **result)
+
+    result['extent_size'] = extent_size
+    result['free'] = dict(before=free_extents * extent_size,
+                          after=(free_extents - used) * extent_size)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: lvm_pv
+short_description: Manage a set of LVM physical volumes at once
+version_added: "2.5"
+description:
+    - "This module initializes or removes all the given physical volumes
+       using a single pvcreate/pvremove invocation with shared options.
+       Signatures of the devices are wiped in parallel."
+options:
+    devices:
+        description:
+            - List of block device paths
+        required: true
+    state:
+        description:
+            - Whether the devices should be physical volumes
+        choices: [present, absent]
+        default: present
+    data_alignment:
+        description:
+            - Alignment of the start of the data area (pvcreate --dataalignment)
+        required: false
+    metadata_size:
+        description:
+            - Size of the metadata area (pvcreate --metadatasize)
+        required: false
+    wipe_signatures:
+        description:
+            - Wipe existing signatures before creating the physical volumes
+              or after removing them
+        type: bool
+        default: true
+    parallel:
+        description:
+            - Maximum number of devices wiped concurrently
+        type: int
+        default: 16
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Initialize all disks of a pool
+  lvm_pv:
+    devices: ["/dev/sdb", "/dev/sdc", "/dev/sdd"]
+    data_alignment: 1m
+'''
+
+RETURN = '''
+devices:
+    description: Per-device results keyed by device path
+    type: dict
+    contains:
+        was_pv:
+            description: Whether the device was a physical volume before
+            type: bool
+        wiped:
+            description: Whether signatures were wiped from the device
+            type: bool
+        created:
+            description: Whether the physical volume was created
+            type: bool
+        removed:
+            description: Whether the physical volume was removed
+            type: bool
+'''
+
+import os
+from multiprocessing.pool import ThreadPool
+
+from ansible.module_utils.basic import AnsibleModule
+
+
+def current_pvs(run_cmd):
+    """Return set of real paths of the existing physical volumes."""
+    rc, out, err = run_cmd(["pvs", "--noheadings", "-o", "pv_name"])
+    if rc != 0:
+        raise RuntimeError("Failed to list physical volumes: %s" % err)
+    return set(os.path.realpath(line.strip()) for line in out.splitlines() if line.strip())
+
+
+def pv_command(state, devices, data_alignment=None, metadata_size=None):
+    """Return the pvcreate/pvremove command for all the devices."""
+    if state == 'present':
+        cmd = ["pvcreate", "-y"]
+        if data_alignment:
+            cmd += ["--dataalignment", data_alignment]
+        if metadata_size:
+            cmd += ["--metadatasize", metadata_size]
+    else:
+        cmd = ["pvremove", "-y"]
+    return cmd + list(devices)
+
+
+def wipe_all(run_cmd, devices, parallel):
+    """Wipe signatures from all the devices concurrently.
+
+    Returns dict mapping device paths to error messages of failed wipes.
+    """
+    def wipe(device):
+        rc, out, err = run_cmd(["wipefs", "-a", device])
+        return device, (err.strip() or "wipefs failed") if rc != 0 else None
+
+    if not devices:
+        return dict()
+
+    pool = ThreadPool(max(1, min(parallel, len(devices))))
+    try:
+        results = pool.map(wipe, devices)
+    finally:
+        pool.close()
+        pool.join()
+    return dict((device, error) for device, error in results if error)
+
+
+def run_module():
+    module_args = dict(
+        devices=dict(type='list', required=True),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+        data_alignment=dict(type='str', required=False),
+        metadata_size=dict(type='str', required=False),
+        wipe_signatures=dict(type='bool', default=True),
+        parallel=dict(type='int', default=16),
+    )
+
+    result = dict(
+        changed=False,
+        devices=dict()
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    state = module.params['state']
+    devices = module.params['devices']
+
+    try:
+        pvs = current_pvs(module.run_command)
+    except RuntimeError as e:
+        module.fail_json(msg=str(e))
+
+    for device in devices:
+        result['devices'][device] = dict(was_pv=os.path.realpath(device) in pvs,
+                                         wiped=False, created=False, removed=False)
+
+    if state == 'present':
+        todo = [d for d in devices if not result['devices'][d]['was_pv']]
+    else:
+        todo = [d for d in devices if result['devices'][d]['was_pv']]
+
+    if not todo:
+        module.exit_json(**result)
+
+    result['changed'] = True
+    if module.check_mode:
+        module.exit_json(**result)
+
+    wipe = module.params['wipe_signatures']
+    if state == 'present' and wipe:
+        errors = wipe_all(module.run_command, todo, module.params['parallel'])
+        for device in todo:
+            result['devices'][device]['wiped'] = device not in errors
+        if errors:
+            module.fail_json(msg="Failed to wipe signatures: %s" % errors, **result)
+
+    rc, out, err = module.run_command(pv_command(state, todo,
+                                                 module.params['data_alignment'],
+                                                 module.params['metadata_size']))
+    if rc != 0:
+        module.fail_json(msg="Failed to %s physical volumes: %s" % ("create" if state == 'present' else "remove", err),
+                         **result)
+
+    for device in todo:
+        result['devices'][device]['created' if state == 'present' else 'removed'] = True
+
+    if state == 'absent' and wipe:
+        errors = wipe_all(module.run_command, todo, module.params['parallel'])
+        for device in todo:
+            result['devices'][device]['wiped'] = device not in errors
+        if errors:
+            module.fail_json(msg="Failed to wipe signatures: %s" % errors, **result)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
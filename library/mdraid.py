@@ -0,0 +1,315 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: mdraid
+short_description: Manage an MD RAID array and report its geometry
+version_added: "2.5"
+description:
+    - "Module creates (or stops and removes) a named MD RAID array on the
+       given devices and returns its chunk size, number of data disks and
+       stripe width, so that the layers above can align to them."
+    - "If the array is not running but its members already carry its
+       superblock (eg. after a reboot without mdadm.conf), the array is
+       assembled instead of created. The module fails instead of creating
+       the array if the level or the members of an existing array do not
+       match."
+options:
+    name:
+        description:
+            - Name of the array, the array is available as /dev/md/<name>
+        required: true
+    devices:
+        description:
+            - List of member device paths
+        required: true
+    level:
+        description:
+            - RAID level
+        choices: [raid0, raid1, raid5, raid6, raid10, "0", "1", "5", "6", "10"]
+        required: true
+    chunk_size:
+        description:
+            - Chunk size, eg. "512 KiB". mdadm default is used if not specified.
+        required: false
+    bitmap:
+        description:
+            - Write-intent bitmap, "internal" or "none". Ignored for raid0
+              which has no redundancy.
+        default: internal
+    metadata:
+        description:
+            - Metadata (superblock) version
+        default: "1.2"
+    state:
+        description:
+            - Whether the array should exist
+        choices: [present, absent]
+        default: present
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Create a RAID 6 array
+  mdraid:
+    name: data
+    devices: ["/dev/sdb", "/dev/sdc", "/dev/sdd", "/dev/sde"]
+    level: raid6
+    chunk_size: 256 KiB
+'''
+
+RETURN = '''
+array:
+    description: Information about the array
+    type: dict
+    contains:
+        device:
+            description: Path to the array (/dev/md/<name>)
+            type: str
+        level:
+            description: RAID level
+            type: str
+        chunk_size:
+            description: Chunk size in bytes (0 for levels without striping)
+            type: int
+        data_disks:
+            description: Number of disks holding data (not parity/copies) in a stripe
+            type: int
+        stripe_width:
+            description: Stripe width in bytes
+            type: int
+        pv_data_alignment:
+            description: Stripe width in format accepted by pvcreate --dataalignment
+            type: str
+'''
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.size import Size
+
+DEV_MD = "/dev/md"
+SYS_CLASS_BLOCK = "/sys/class/block"
+LEVELS = ['raid0', 'raid1', 'raid5', 'raid6', 'raid10']
+NO_REDUNDANCY = ['raid0']
+DEFAULT_CHUNK = 512 * 1024
+
+
+def normalize_level(level):
+    level = str(level).lower()
+    return level if level.startswith("raid") else "raid" + level
+
+
+def data_disks(level, raid_disks, layout=0):
+    """Return number of disks holding data in a stripe."""
+    if level == 'raid0':
+        return raid_disks
+    if level == 'raid1':
+        return 1
+    if level in ('raid4', 'raid5'):
+        return raid_disks - 1
+    if level == 'raid6':
+        return raid_disks - 2
+    if level == 'raid10':
+        # layout encodes the number of near and far copies
+        copies = max(1, layout & 0xff) * max(1, (layout >> 8) & 0xff)
+        return max(1, raid_disks // copies)
+    raise ValueError("Unsupported RAID level '%s'" % level)
+
+
+def geometry(device, level, chunk_size, raid_disks, layout=None):
+    """Return dict describing the array geometry."""
+    if layout is None:
+        # mdadm default for raid10 is two near copies
+        layout = 0x102 if level == 'raid10' else 0
+    if level == 'raid1':
+        chunk_size = 0
+    stripe_disks = data_disks(level, raid_disks, layout)
+    stripe_width = chunk_size * stripe_disks
+    return dict(device=device,
+                level=level,
+                chunk_size=chunk_size,
+                data_disks=stripe_disks,
+                stripe_width=stripe_width,
+                pv_data_alignment="%dk" % (stripe_width // 1024) if stripe_width else "")
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _kname(device):
+    return os.path.basename(os.path.realpath(device))
+
+
+def read_geometry(device):
+    """Return geometry of an existing array from sysfs."""
+    mddir = "%s/%s/md" % (SYS_CLASS_BLOCK, _kname(device))
+    level = _read(mddir + "/level")
+    return geometry(device, level,
+                    int(_read(mddir + "/chunk_size")),
+                    int(_read(mddir + "/raid_disks")),
+                    int(_read(mddir + "/layout")))
+
+
+def array_members(device):
+    """Return kernel names of the members of a running array."""
+    return sorted(os.listdir("%s/%s/slaves" % (SYS_CLASS_BLOCK, _kname(device))))
+
+
+def examine(run_cmd, device):
+    """Return dict with the MD superblock fields of the device or None."""
+    rc, out, err = run_cmd(["mdadm", "--examine", "--export", device])
+    if rc != 0:
+        return None
+    superblock = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+    return superblock if superblock.get('MD_UUID') else None
+
+
+def superblock_mismatch(name, level, devices, superblocks):
+    """Return list of reasons why the members can not be assembled as the array.
+
+    superblocks maps member devices to their superblocks (None if there is
+    none).
+    """
+    errors = []
+    missing = [d for d in devices if not superblocks.get(d)]
+    if missing:
+        errors.append("devices without the array superblock: %s" % ", ".join(missing))
+
+    found = [sb for sb in superblocks.values() if sb]
+    if len(set(sb['MD_UUID'] for sb in found)) > 1:
+        errors.append("devices belong to different arrays")
+    for sb in found:
+        if sb.get('MD_NAME', '').split(':')[-1] != name:
+            errors.append("devices belong to array '%s'" % sb.get('MD_NAME', ''))
+            break
+    for sb in found:
+        if normalize_level(sb.get('MD_LEVEL', '')) != level:
+            errors.append("existing level is %s" % sb.get('MD_LEVEL'))
+            break
+    for sb in found:
+        if sb.get('MD_DEVICES') and int(sb['MD_DEVICES']) != len(devices):
+            errors.append("existing array has %s devices" % sb['MD_DEVICES'])
+            break
+    return errors
+
+
+def create_command(device, level, devices, chunk_size=None, bitmap="internal", metadata="1.2"):
+    cmd = ["mdadm", "--create", device, "--run", "--level=%s" % level,
+           "--raid-devices=%d" % len(devices), "--metadata=%s" % metadata]
+    if chunk_size and level != 'raid1':
+        cmd.append("--chunk=%dK" % (chunk_size // 1024))
+    if bitmap and level not in NO_REDUNDANCY:
+        cmd.append("--bitmap=%s" % bitmap)
+    return cmd + list(devices)
+
+
+def run_module():
+    module_args = dict(
+        name=dict(type='str', required=True),
+        devices=dict(type='list', required=True),
+        level=dict(type='str', required=True,
+                   choices=LEVELS + [level[4:] for level in LEVELS]),
+        chunk_size=dict(type='str', required=False),
+        bitmap=dict(type='str', default='internal', choices=['internal', 'none']),
+        metadata=dict(type='str', default='1.2'),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+    )
+
+    result = dict(
+        changed=False,
+        array=dict()
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    device = "%s/%s" % (DEV_MD, module.params['name'])
+    level = normalize_level(module.params['level'])
+    devices = module.params['devices']
+    exists = os.path.exists(device)
+
+    try:
+        chunk_size = Size(module.params['chunk_size']).bytes if module.params['chunk_size'] else DEFAULT_CHUNK
+    except ValueError as e:
+        module.fail_json(msg=str(e))
+
+    superblocks = dict()
+    if not exists:
+        superblocks = dict((d, examine(module.run_command, d)) for d in devices)
+
+    if module.params['state'] == 'absent':
+        # members of a stopped array still carry its superblock
+        has_superblock = [d for d, sb in superblocks.items()
+                          if sb and sb.get('MD_NAME', '').split(':')[-1] == module.params['name']]
+        if exists or has_superblock:
+            result['changed'] = True
+            if not module.check_mode:
+                if exists:
+                    rc, out, err = module.run_command(["mdadm", "--stop", device])
+                    if rc != 0:
+                        module.fail_json(msg="Failed to stop array %s: %s" % (device, err), **result)
+                rc, out, err = module.run_command(["mdadm", "--zero-superblock"] +
+                                                  (devices if exists else has_superblock))
+                if rc != 0:
+                    module.fail_json(msg="Failed to remove RAID metadata: %s" % err, **result)
+        module.exit_json(**result)
+
+    if exists:
+        try:
+            current = read_geometry(device)['level']
+            members = array_members(device)
+        except (IOError, OSError, ValueError) as e:
+            module.fail_json(msg="Failed to get information about array %s: %s" % (device, e), **result)
+        if current != level or members != sorted(_kname(d) for d in devices):
+            module.fail_json(msg="Array %s exists with level %s and members %s, requested %s on %s" %
+                             (device, current, ", ".join(members), level, ", ".join(devices)), **result)
+    elif any(superblocks.values()):
+        errors = superblock_mismatch(module.params['name'], level, devices, superblocks)
+        if errors:
+            module.fail_json(msg="Refusing to create array %s over an existing one: %s" %
+                             (device, "; ".join(errors)), **result)
+        result['changed'] = True
+        if module.check_mode:
+            result['array'] = geometry(device, level, chunk_size, len(devices))
+            module.exit_json(**result)
+
+        rc, out, err = module.run_command(["mdadm", "--assemble", device, "--run"] + devices)
+        if rc != 0:
+            module.fail_json(msg="Failed to assemble array %s: %s" % (device, err), **result)
+        module.run_command(["udevadm", "settle"])
+    else:
+        result['changed'] = True
+        if module.check_mode:
+            result['array'] = geometry(device, level, chunk_size, len(devices))
+            module.exit_json(**result)
+
+        rc, out, err = module.run_command(create_command(device, level, devices, chunk_size,
+                                                         module.params['bitmap'], module.params['metadata']))
+        if rc != 0:
+            module.fail_json(msg="Failed to create array %s: %s" % (device, err), **result)
+        module.run_command(["udevadm", "settle"])
+
+    try:
+        result['array'] = read_geometry(device)
+    except (IOError, OSError, ValueError) as e:
+        module.fail_json(msg="Failed to get geometry of array %s: %s" % (device, e), **result)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
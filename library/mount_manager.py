@@ -0,0 +1,315 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: mount_manager
+short_description: Manage a set of mounts and their /etc/fstab entries at once
+version_added: "2.5"
+description:
+    - "This module takes all mount entries at once, rewrites /etc/fstab
+       atomically in a single step and then mounts or unmounts the file
+       systems in dependency order (parents are mounted first and unmounted
+       last)."
+    - "Mounts whose options changed are remounted. If the remount fails or
+       an option that the file system cannot change on remount (eg. xfs
+       logbsize or allocsize) changed, the file system is unmounted and
+       mounted again instead."
+    - "The module does not reload systemd, notify a handler instead when
+       the module reports a change."
+options:
+    mounts:
+        description:
+            - List of mount entries. Each entry is a dict with the keys
+              src, path, fstype, opts (defaults to "defaults"), dump
+              (defaults to 0), passno (defaults to 0) and state (one of
+              mounted, unmounted, present, absent; defaults to mounted).
+        required: true
+    fstab:
+        description:
+            - Path to the fstab file
+        required: false
+        default: /etc/fstab
+author:
+    - Jan Pokorny (japokorn@redhat.com)
+'''
+
+EXAMPLES = '''
+- name: Mount all the volumes
+  mount_manager:
+    mounts:
+      - src: UUID=6c75fa75-e5ab-4a12-a567-c8aa0b4b60a5
+        path: /opt/data
+        fstype: xfs
+      - src: /dev/mapper/vg-logs
+        path: /opt/data/logs
+        fstype: xfs
+        opts: noatime
+  notify: reload systemd
+'''
+
+RETURN = '''
+fstab_changed:
+    description: Whether /etc/fstab was rewritten
+    type: bool
+mounts:
+    description: Per-mount results
+    type: list
+    contains:
+        path:
+            description: Mount point path
+            type: str
+        state:
+            description: Requested state of the mount
+            type: str
+        fstab_changed:
+            description: Whether the fstab entry of the mount changed
+            type: bool
+        actions:
+            description: Actions taken (umount, mount, remount) in order.
+                         A failed remount is followed by umount and mount.
+            type: list
+'''
+
+import os
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule
+
+PROC_MOUNTS = "/proc/self/mounts"
+MOUNT_STATES = ('mounted', 'unmounted', 'present', 'absent')
+
+# options the file systems ignore or refuse on remount
+NO_REMOUNT_OPTIONS = {
+    'xfs': ['logbufs', 'logbsize', 'allocsize', 'largeio', 'nolargeio', 'swalloc',
+            'sunit', 'swidth', 'noalign', 'wsync', 'dax', 'logdev', 'rtdev'],
+    'ext3': ['data', 'journal_dev', 'dax'],
+    'ext4': ['data', 'journal_checksum', 'journal_async_commit', 'journal_dev', 'dax'],
+}
+
+
+def _escape(value):
+    return value.replace("\\", "\\134").replace(" ", "\\040").replace("\t", "\\011")
+
+
+def _unescape(value):
+    return value.replace("\\040", " ").replace("\\011", "\t").replace("\\134", "\\")
+
+
+def _mount_point(line):
+    """Return the mount point of an fstab line or None for comments/blank lines."""
+    fields = line.split()
+    if not fields or fields[0].startswith('#') or len(fields) < 2:
+        return None
+    return os.path.normpath(_unescape(fields[1]))
+
+
+def fstab_line(mount):
+    return "%s %s %s %s %d %d\n" % (_escape(mount['src']), _escape(mount['path']),
+                                    mount['fstype'], mount['opts'],
+                                    mount['dump'], mount['passno'])
+
+
+def normalize(mount):
+    """Return mount entry with defaults filled in."""
+    result = dict(opts="defaults", dump=0, passno=0, state="mounted")
+    result.update((k, v) for k, v in mount.items() if v is not None)
+    result['path'] = os.path.normpath(result['path'])
+    result['dump'] = int(result['dump'])
+    result['passno'] = int(result['passno'])
+    if result['state'] not in MOUNT_STATES:
+        raise ValueError("invalid state '%s' for mount point %s" % (result['state'], result['path']))
+    return result
+
+
+def update_fstab(lines, mounts):
+    """Apply the mount entries to the fstab lines.
+
+    Returns the new list of lines and a dict mapping mount point paths to
+    the fstab lines they replaced (None if there was none).
+    """
+    by_path = dict((m['path'], m) for m in mounts)
+    old_lines = dict((path, None) for path in by_path)
+
+    new_lines = []
+    written = set()
+    for line in lines:
+        path = _mount_point(line)
+        if path not in by_path:
+            new_lines.append(line)
+            continue
+
+        if old_lines[path] is None:
+            old_lines[path] = line
+
+        mount = by_path[path]
+        if mount['state'] != 'absent' and path not in written:
+            new_lines.append(fstab_line(mount))
+            written.add(path)
+
+    for mount in mounts:
+        if mount['state'] != 'absent' and mount['path'] not in written:
+            if new_lines and not new_lines[-1].endswith('\n'):
+                new_lines[-1] += '\n'
+            new_lines.append(fstab_line(mount))
+            written.add(mount['path'])
+
+    return new_lines, old_lines
+
+
+def _depth(mount):
+    """Sort key placing parent mount points before their children."""
+    return (len(mount['path'].rstrip('/').split('/')), mount['path'])
+
+
+def current_mounts(proc_mounts=PROC_MOUNTS):
+    """Return set of currently mounted mount point paths."""
+    mounted = set()
+    with open(proc_mounts) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) > 1:
+                mounted.add(os.path.normpath(_unescape(fields[1])))
+    return mounted
+
+
+def entry_changed(mount, old_line):
+    new_line = fstab_line(mount) if mount['state'] != 'absent' else None
+    return old_line != new_line
+
+
+def remountable(old_fields, new_fields):
+    """Return whether the option change can be applied by a remount."""
+    old_opts = set(old_fields[3].split(','))
+    new_opts = set(new_fields[3].split(','))
+    fixed = NO_REMOUNT_OPTIONS.get(new_fields[2], [])
+    return not any(opt.split('=')[0] in fixed for opt in old_opts ^ new_opts)
+
+
+def plan_actions(mounts, old_lines, mounted):
+    """Return lists of (mount, action) pairs for the unmount and mount passes.
+
+    Unmounts are ordered children first, mounts parents first.
+    """
+    umounts = []
+    mounts_ = []
+    for mount in mounts:
+        path = mount['path']
+        if mount['state'] in ('unmounted', 'absent'):
+            if path in mounted:
+                umounts.append((mount, 'umount'))
+        elif mount['state'] == 'mounted':
+            if path not in mounted:
+                mounts_.append((mount, 'mount'))
+            elif old_lines[path] is None:
+                mounts_.append((mount, 'remount'))
+            elif entry_changed(mount, old_lines[path]):
+                old_fields = old_lines[path].split()
+                new_fields = fstab_line(mount).split()
+                if (old_fields[0], old_fields[2]) == (new_fields[0], new_fields[2]) and \
+                        remountable(old_fields, new_fields):
+                    mounts_.append((mount, 'remount'))
+                else:
+                    # the device, file system type or a fixed option changed
+                    umounts.append((mount, 'umount'))
+                    mounts_.append((mount, 'mount'))
+
+    umounts.sort(key=lambda item: _depth(item[0]), reverse=True)
+    mounts_.sort(key=lambda item: _depth(item[0]))
+    return umounts, mounts_
+
+
+def write_fstab(module, path, lines):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".fstab")
+    with os.fdopen(fd, "w") as f:
+        f.writelines(lines)
+    module.atomic_move(tmp_path, path)
+
+
+def run_module():
+    module_args = dict(
+        mounts=dict(type='list', required=True),
+        fstab=dict(type='str', required=False, default='/etc/fstab'),
+    )
+
+    result = dict(
+        changed=False,
+        fstab_changed=False,
+        mounts=[]
+    )
+
+    module = AnsibleModule(argument_spec=module_args,
+                           supports_check_mode=True)
+
+    try:
+        mounts = [normalize(m) for m in module.params['mounts']]
+    except (KeyError, ValueError) as e:
+        module.fail_json(msg="Invalid mount entry: %s" % e)
+
+    fstab = module.params['fstab']
+    lines = []
+    if os.path.exists(fstab):
+        with open(fstab) as f:
+            lines = f.readlines()
+
+    new_lines, old_lines = update_fstab(lines, mounts)
+    umounts, mounts_ = plan_actions(mounts, old_lines, current_mounts())
+
+    actions = dict((m['path'], []) for m in mounts)
+    for mount, action in umounts + mounts_:
+        actions[mount['path']].append(action)
+
+    result['fstab_changed'] = new_lines != lines
+    result['changed'] = result['fstab_changed'] or bool(umounts or mounts_)
+    result['mounts'] = [dict(path=m['path'], state=m['state'], actions=actions[m['path']],
+                             fstab_changed=entry_changed(m, old_lines[m['path']]))
+                        for m in mounts]
+
+    if module.check_mode:
+        module.exit_json(**result)
+
+    if result['fstab_changed']:
+        write_fstab(module, fstab, new_lines)
+
+    # unmount children first
+    for mount, action in umounts:
+        rc, out, err = module.run_command(['umount', mount['path']])
+        if rc != 0:
+            module.fail_json(msg="Failed to unmount %s: %s" % (mount['path'], err), **result)
+        if mount['state'] == 'absent':
+            try:
+                os.rmdir(mount['path'])
+            except OSError:
+                pass
+
+    # mount parents first
+    for mount, action in mounts_:
+        if action == 'remount':
+            rc, out, err = module.run_command(['mount', '-o', 'remount', mount['path']])
+            if rc == 0:
+                continue
+            # same as the mount module, fall back to umount and mount
+            actions[mount['path']].extend(['umount', 'mount'])
+            rc, out, err = module.run_command(['umount', mount['path']])
+            if rc != 0:
+                module.fail_json(msg="Failed to remount %s: %s" % (mount['path'], err), **result)
+        elif not os.path.isdir(mount['path']):
+            os.makedirs(mount['path'])
+        rc, out, err = module.run_command(['mount', mount['path']])
+        if rc != 0:
+            module.fail_json(msg="Failed to mount %s: %s" % (mount['path'], err), **result)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -48,6 +48,7 @@ import os
 import re
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.inventory import get_inventory, lookup
 
 DEV_MD = "/dev/md"
 DEV_MAPPER = "/dev/mapper"
@@ -75,21 +76,37 @@ def resolve_blockdev(spec, run_cmd):
     return canonical_device(os.path.realpath(device))
 
 
+def resolve_cached(spec, inventory):
+    """ Resolve spec using the device inventory cache, returns '' on miss. """
+    if spec.startswith('/'):
+        return ''
+
+    name = lookup(inventory, spec)
+    if name is None or not os.path.exists("/dev/%s" % name):
+        return ''
+
+    return canonical_device("/dev/%s" % name)
+
+
 def _get_dm_name_from_kernel_dev(kdev):
     return open("%s/%s/dm/name" % (SYS_CLASS_BLOCK, os.path.basename(kdev))).read().strip()
 
 
 def _get_md_name_from_kernel_dev(kdev):
-    minor = os.minor(os.stat(kdev).st_rdev)
-    return next(name for name in os.listdir(DEV_MD)
-                    if os.minor(os.stat("%/%s" % (DEV_MD, name).st_rdev) == minor))
+    rdev = os.stat(kdev).st_rdev
+    if not os.path.isdir(DEV_MD):
+        return None
+    return next((name for name in sorted(os.listdir(DEV_MD))
+                 if os.stat("%s/%s" % (DEV_MD, name)).st_rdev == rdev), None)
 
 
 def canonical_device(device):
     if device.startswith("/dev/dm-"):
         device = "%s/%s" % (DEV_MAPPER, _get_dm_name_from_kernel_dev(device))
     elif MD_KERNEL_DEV.match(device):
-        device = "%s/%s" % (DEV_MD, _get_md_name_from_kernel_dev(device))
+        name = _get_md_name_from_kernel_dev(device)
+        if name:
+            device = "%s/%s" % (DEV_MD, name)
     return device
 
 
@@ -108,7 +125,14 @@ def run_module():
     )
 
     try:
-        result['device'] = resolve_blockdev(module.params['spec'], run_cmd=module.run_command)
+        inventory, rescanned = get_inventory(module.run_command)
+        result['device'] = resolve_cached(module.params['spec'], inventory)
+    except Exception:
+        pass
+
+    try:
+        if not result['device']:
+            result['device'] = resolve_blockdev(module.params['spec'], run_cmd=module.run_command)
     except Exception:
         pass
 
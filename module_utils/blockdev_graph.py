@@ -0,0 +1,171 @@
+#!/bin/python2
+
+import os
+from collections import deque
+
+from ansible.module_utils.inventory import scan_sysfs
+
+PROC_MOUNTINFO = "/proc/self/mountinfo"
+PROC_SWAPS = "/proc/swaps"
+
+
+def _unescape(value):
+    return value.replace("\\040", " ").replace("\\011", "\t").replace("\\134", "\\")
+
+
+def read_mounts(devices, mountinfo=PROC_MOUNTINFO, swaps=PROC_SWAPS):
+    ''' returns dict mapping kernel names to lists of their mount points
+
+        active swap devices get "[SWAP]" as their mount point
+    '''
+    by_majmin = dict((info['majmin'], name) for name, info in devices.items())
+    mounts = dict()
+
+    try:
+        with open(mountinfo) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 4 and fields[2] in by_majmin:
+                    mounts.setdefault(by_majmin[fields[2]], []).append(_unescape(fields[4]))
+    except (IOError, OSError):
+        pass
+
+    try:
+        with open(swaps) as f:
+            for line in f.readlines()[1:]:
+                fields = line.split()
+                if fields:
+                    name = os.path.basename(os.path.realpath(_unescape(fields[0])))
+                    if name in devices:
+                        mounts.setdefault(name, []).append("[SWAP]")
+    except (IOError, OSError):
+        pass
+
+    return mounts
+
+
+def read_pvs(run_cmd):
+    ''' returns dict mapping kernel names of PVs to their VG names
+    '''
+    if run_cmd is None:
+        return dict()
+
+    rc, out, err = run_cmd(["pvs", "--noheadings", "-o", "pv_name,vg_name"])
+    if rc != 0:
+        return dict()
+
+    pvs = dict()
+    for line in out.splitlines():
+        fields = line.split()
+        if fields:
+            pvs[os.path.basename(os.path.realpath(fields[0]))] = fields[1] if len(fields) > 1 else ""
+    return pvs
+
+
+class BlockDeviceGraph(object):
+    ''' Holder/slave graph of all block devices
+
+        Edges point from a device to the devices built on top of it
+        (holders and partitions), e.g. disk -> partition -> md -> dm -> ...
+    '''
+
+    def __init__(self, devices, mounts=None, pvs=None):
+        self.devices = devices
+        self.mounts = mounts or dict()
+        self.pvs = pvs or dict()
+
+        self._children = dict((name, set()) for name in devices)
+        self._parents = dict((name, set()) for name in devices)
+        for name, info in devices.items():
+            for child in list(info['holders']) + list(info['partitions']):
+                self._add_edge(name, child)
+            for parent in info['slaves']:
+                self._add_edge(parent, name)
+
+    @classmethod
+    def scan(cls, run_cmd=None):
+        ''' builds the graph of the current system in one sysfs scan
+        '''
+        devices = scan_sysfs()
+        return cls(devices, read_mounts(devices), read_pvs(run_cmd))
+
+    def _add_edge(self, parent, child):
+        if parent in self._children and child in self._parents:
+            self._children[parent].add(child)
+            self._parents[child].add(parent)
+
+    def name(self, device):
+        ''' returns kernel name of the device given by path or name
+        '''
+        name = os.path.basename(os.path.realpath(device)) if device.startswith('/') else device
+        if name not in self.devices:
+            raise KeyError("Unknown block device '%s'" % device)
+        return name
+
+    def children(self, device):
+        ''' returns devices built directly on top of the device
+        '''
+        return sorted(self._children[self.name(device)])
+
+    def parents(self, device):
+        ''' returns devices the device is built directly on
+        '''
+        return sorted(self._parents[self.name(device)])
+
+    def _walk(self, name, edges):
+        seen = set([name])
+        order = []
+        queue = deque([name])
+        while queue:
+            current = queue.popleft()
+            for nxt in sorted(edges[current]):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    order.append(nxt)
+                    queue.append(nxt)
+        return order
+
+    def descendants(self, device):
+        ''' returns all devices built on top of the device (breadth first)
+        '''
+        return self._walk(self.name(device), self._children)
+
+    def ancestors(self, device):
+        ''' returns all devices the device is built on (breadth first)
+        '''
+        return self._walk(self.name(device), self._parents)
+
+    def teardown_order(self, devices):
+        ''' returns the devices and everything on top of them ordered so that
+            every device comes before the devices it is built on
+        '''
+        order = []
+        done = set()
+
+        def visit(name):
+            if name in done:
+                return
+            done.add(name)
+            for child in sorted(self._children[name]):
+                visit(child)
+            order.append(name)
+
+        for device in devices:
+            visit(self.name(device))
+        return order
+
+    def stack_mounts(self, device):
+        ''' returns mount points of the device and of all devices on top of it
+        '''
+        name = self.name(device)
+        mounts = []
+        for dev in [name] + self.descendants(name):
+            mounts.extend(self.mounts.get(dev, []))
+        return mounts
+
+    def in_use(self, device):
+        ''' returns True if the device or anything on top of it is mounted,
+            the device has holders or partitions or it is a PV of a VG
+        '''
+        name = self.name(device)
+        return bool(self.stack_mounts(name) or self._children[name] or self.pvs.get(name))
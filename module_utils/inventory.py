@@ -0,0 +1,241 @@
+#!/bin/python2
+
+import glob
+import json
+import os
+
+INVENTORY_PATH = "/run/storage-role/inventory.json"
+SYS_CLASS_BLOCK = "/sys/class/block"
+UEVENT_SEQNUM = "/sys/kernel/uevent_seqnum"
+UDEV_DATA = "/run/udev/data"
+SYMLINK_DIRS = ["/dev/mapper", "/dev/md", "/dev/disk/by-*"]
+SIGNATURE_KEYS = ["TYPE", "UUID", "LABEL", "PTTYPE", "USAGE"]
+
+
+def _read(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return default
+
+
+def uevent_seqnum():
+    ''' returns the kernel uevent sequence number or None if unavailable
+    '''
+    seqnum = _read(UEVENT_SEQNUM)
+    return int(seqnum) if seqnum else None
+
+
+def lvm_seqnos(run_cmd):
+    ''' returns dict mapping VG names to their metadata sequence numbers
+    '''
+    if run_cmd is None:
+        return {}
+
+    rc, out, err = run_cmd(["vgs", "--noheadings", "-o", "vg_name,vg_seqno"])
+    if rc != 0:
+        return {}
+
+    seqnos = {}
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) == 2:
+            seqnos[fields[0]] = int(fields[1])
+    return seqnos
+
+
+def device_stamp(majmin):
+    ''' returns modification time of the udev database entry of the device
+
+        udev rewrites the entry on every event it processes for the device,
+        so the stamp changes whenever the device does.
+    '''
+    try:
+        return os.stat("%s/b%s" % (UDEV_DATA, majmin)).st_mtime
+    except OSError:
+        return None
+
+
+def _list(path):
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return []
+
+
+def scan_sysfs():
+    ''' returns dict of block devices found in sysfs keyed by kernel name
+    '''
+    devices = dict()
+    for name in _list(SYS_CLASS_BLOCK):
+        sysdir = "%s/%s" % (SYS_CLASS_BLOCK, name)
+        devices[name] = dict(name=name,
+                             majmin=_read(sysdir + "/dev", ""),
+                             size=int(_read(sysdir + "/size", "0")) * 512,
+                             partition=os.path.exists(sysdir + "/partition"),
+                             partitions=[],
+                             holders=_list(sysdir + "/holders"),
+                             slaves=_list(sysdir + "/slaves"),
+                             symlinks=[],
+                             signature=None)
+
+    for name, info in devices.items():
+        if info['partition']:
+            parent = os.path.basename(os.path.dirname(os.path.realpath("%s/%s" % (SYS_CLASS_BLOCK, name))))
+            if parent in devices:
+                devices[parent]['partitions'].append(name)
+
+    return devices
+
+
+def scan_symlinks():
+    ''' returns dict mapping kernel names to lists of symlinks pointing to them
+    '''
+    symlinks = dict()
+    for pattern in SYMLINK_DIRS:
+        for devdir in sorted(glob.glob(pattern)):
+            for entry in _list(devdir):
+                path = "%s/%s" % (devdir, entry)
+                name = os.path.basename(os.path.realpath(path))
+                if path != "/dev/" + name:
+                    symlinks.setdefault(name, []).append(path)
+    return symlinks
+
+
+def probe_signatures(run_cmd, names):
+    ''' probes signatures of all the given devices using a single blkid call
+
+        returns dict mapping kernel names to dicts with SIGNATURE_KEYS
+    '''
+    signatures = dict((name, dict()) for name in names)
+    if not names:
+        return signatures
+
+    # blkid returns non-zero if any of the devices has no signature
+    rc, out, err = run_cmd(["blkid", "-p", "-o", "export"] + ["/dev/" + name for name in names])
+
+    current = None
+    for line in out.splitlines():
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        if key == "DEVNAME":
+            current = signatures.setdefault(os.path.basename(value), dict())
+        elif current is not None and key in SIGNATURE_KEYS:
+            current[key] = value
+    return signatures
+
+
+def load(path=INVENTORY_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def save(inventory, path=INVENTORY_PATH):
+    ''' atomically writes the inventory, failures are ignored
+    '''
+    tmp_path = "%s.%d" % (path, os.getpid())
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), 0o700)
+        with open(tmp_path, "w") as f:
+            json.dump(inventory, f)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+
+
+def scan(run_cmd, cached=None, lvm_changed=True):
+    ''' scans block devices reusing signatures of unchanged cached devices
+
+        returns dict of devices and list of names of the (re)probed devices
+    '''
+    devices = scan_sysfs()
+    symlinks = scan_symlinks()
+    cached_devices = cached['devices'] if cached else dict()
+
+    to_probe = []
+    for name, info in devices.items():
+        info['symlinks'] = symlinks.get(name, [])
+        info['stamp'] = device_stamp(info['majmin'])
+
+        old = cached_devices.get(name)
+        if old and old['majmin'] == info['majmin'] and old['stamp'] is not None and \
+                old['stamp'] == info['stamp'] and old['signature'] is not None and \
+                not (lvm_changed and name.startswith("dm-")):
+            info['signature'] = old['signature']
+        else:
+            to_probe.append(name)
+
+    for name, signature in probe_signatures(run_cmd, sorted(to_probe)).items():
+        if name in devices:
+            devices[name]['signature'] = signature
+
+    return devices, sorted(to_probe)
+
+
+def get_inventory(run_cmd, path=INVENTORY_PATH, probe=None):
+    ''' returns the device inventory and list of rescanned devices
+
+        The cached inventory is reused as it is if both the uevent sequence
+        number and the LVM metadata sequence numbers match the ones stored
+        with it. Otherwise only the devices that changed are probed again.
+
+        Devices listed in probe (kernel names) are always probed directly,
+        after udev has settled. The change event for a device the caller
+        has just written a signature to may not have been queued yet, so
+        neither the sequence number nor the udev stamp can be trusted.
+    '''
+    if probe:
+        run_cmd(["udevadm", "settle"])
+
+    cached = load(path)
+    tags = dict(uevent_seqnum=uevent_seqnum(), lvm_seqnos=lvm_seqnos(run_cmd))
+
+    up_to_date = cached and tags['uevent_seqnum'] is not None and cached.get('tags') == tags
+    if up_to_date:
+        devices, rescanned = cached['devices'], []
+    else:
+        if cached and not probe and tags['uevent_seqnum'] != cached['tags']['uevent_seqnum']:
+            # let udev finish processing the events so that the stamps are current
+            run_cmd(["udevadm", "settle"])
+            tags['uevent_seqnum'] = uevent_seqnum()
+
+        lvm_changed = not cached or tags['lvm_seqnos'] != cached['tags']['lvm_seqnos']
+        devices, rescanned = scan(run_cmd, cached, lvm_changed)
+
+    to_probe = sorted(set(name for name in probe or [] if name in devices) - set(rescanned))
+    for name, signature in probe_signatures(run_cmd, to_probe).items():
+        if name in devices:
+            devices[name]['signature'] = signature
+
+    inventory = dict(tags=tags, devices=devices)
+    if not up_to_date or to_probe:
+        save(inventory, path)
+    return inventory, sorted(set(rescanned) | set(to_probe))
+
+
+def lookup(inventory, spec):
+    ''' returns kernel name of the device described by spec or None
+
+        spec can be a kernel name, a basename of a symlink pointing to the
+        device or a KEY=value pair matching the device's signature
+    '''
+    devices = inventory['devices']
+    if "=" in spec:
+        key, value = spec.split("=", 1)
+        value = value.strip('"')
+        if key not in SIGNATURE_KEYS:
+            return None
+        return next((name for name, info in sorted(devices.items())
+                     if (info['signature'] or dict()).get(key) == value), None)
+
+    if spec in devices:
+        return spec
+
+    return next((name for name, info in sorted(devices.items())
+                 if any(os.path.basename(link) == spec for link in info['symlinks'])), None)
@@ -0,0 +1,76 @@
+
+import os
+import pytest
+
+import blockdev_graph
+
+
+def dev(majmin, holders=(), slaves=(), partitions=()):
+    return dict(majmin=majmin, holders=list(holders), slaves=list(slaves), partitions=list(partitions))
+
+
+# sda/sdb -> sda1/sdb1 -> md127 -> dm-0 (LUKS) -> dm-1 (LV, mounted), sdc unused
+devices = {'sda': dev('8:0', partitions=['sda1']),
+           'sda1': dev('8:1', holders=['md127']),
+           'sdb': dev('8:16', partitions=['sdb1']),
+           'sdb1': dev('8:17', holders=['md127']),
+           'md127': dev('9:127', holders=['dm-0'], slaves=['sda1', 'sdb1']),
+           'dm-0': dev('253:0', holders=['dm-1'], slaves=['md127']),
+           'dm-1': dev('253:1', slaves=['dm-0']),
+           'sdc': dev('8:32')}
+
+mountinfo = """22 1 8:3 / / rw,relatime shared:1 - xfs /dev/sda3 rw
+98 22 253:1 / /opt/my\\040data rw,relatime shared:2 - xfs /dev/mapper/vg-data rw
+99 22 0:42 / /tmp rw shared:3 - tmpfs tmpfs rw
+"""
+
+
+@pytest.fixture
+def graph():
+    return blockdev_graph.BlockDeviceGraph(devices, {'dm-1': ['/opt/data']}, {'dm-0': 'vg'})
+
+
+def test_descendants_ancestors(graph):
+    assert graph.descendants('sda') == ['sda1', 'md127', 'dm-0', 'dm-1']
+    assert graph.descendants('/dev/sdc') == []
+    assert graph.ancestors('dm-1') == ['dm-0', 'md127', 'sda1', 'sdb1', 'sda', 'sdb']
+    assert graph.children('md127') == ['dm-0']
+    assert graph.parents('sda1') == ['sda']
+
+    with pytest.raises(KeyError):
+        graph.descendants('sdz')
+
+
+def test_teardown_order(graph):
+    order = graph.teardown_order(['sda', 'sdb'])
+    assert order == ['dm-1', 'dm-0', 'md127', 'sda1', 'sda', 'sdb1', 'sdb']
+    assert graph.teardown_order(['md127']) == ['dm-1', 'dm-0', 'md127']
+
+
+def test_in_use(graph):
+    assert graph.stack_mounts('sdb') == ['/opt/data']
+    assert graph.in_use('sdb')
+    assert graph.in_use('dm-1')
+    assert not graph.in_use('sdc')
+
+    idle = blockdev_graph.BlockDeviceGraph(devices, {}, {'dm-0': 'vg'})
+    assert idle.in_use('dm-0')
+    assert not idle.in_use('dm-1')
+
+
+def test_read_mounts(tmpdir, monkeypatch):
+    tmpdir.join('mountinfo').write(mountinfo)
+    tmpdir.join('swaps').write("Filename Type Size Used Priority\n/dev/sdc partition 1048572 0 -2\n")
+    monkeypatch.setattr(os.path, 'realpath', lambda p: p)
+
+    mounts = blockdev_graph.read_mounts(devices, str(tmpdir.join('mountinfo')), str(tmpdir.join('swaps')))
+    assert mounts == {'dm-1': ['/opt/my data'], 'sdc': ['[SWAP]']}
+
+
+def test_read_pvs(monkeypatch):
+    monkeypatch.setattr(os.path, 'realpath', lambda p: p.replace('/dev/md/data', '/dev/md127'))
+
+    def run_cmd(args):
+        return (0, "  /dev/md/data  vg\n  /dev/sdc\n", "")
+    assert blockdev_graph.read_pvs(run_cmd) == {'md127': 'vg', 'sdc': ''}
+    assert blockdev_graph.read_pvs(lambda args: (5, "", "")) == {}
@@ -0,0 +1,64 @@
+
+import pytest
+
+import blockdev_wipe
+
+
+MiB = 1024 ** 2
+
+
+@pytest.mark.parametrize('method,discard,zeroes,expected', [('auto', 0, 0, 'signatures'),
+                                                            ('auto', 4096, 0, 'discard'),
+                                                            ('auto', 4096, 4096, 'discard'),
+                                                            ('auto', 0, 4096, 'signatures'),
+                                                            ('zeroout', 4096, 4096, 'zeroout'),
+                                                            ('discard', 0, 4096, 'signatures'),
+                                                            ('discard', 4096, 4096, 'discard'),
+                                                            ('zeroout', 4096, 0, 'signatures'),
+                                                            ('signatures', 4096, 4096, 'signatures')])
+def test_choose_method(method, discard, zeroes, expected):
+    assert blockdev_wipe.choose_method(method, discard, zeroes) == expected
+
+
+def test_signature_regions():
+    assert blockdev_wipe.signature_regions(10 * MiB, MiB) == [(0, MiB), (9 * MiB, MiB)]
+    assert blockdev_wipe.signature_regions(MiB + 512, MiB) == [(0, MiB + 512)]
+
+
+def test_device_caps(tmpdir, monkeypatch):
+    queue = tmpdir.mkdir('loop0').mkdir('queue')
+    queue.join('discard_max_bytes').write('4294966784\n')
+    queue.join('write_zeroes_max_bytes').write('0\n')
+    monkeypatch.setattr(blockdev_wipe, 'SYS_CLASS_BLOCK', str(tmpdir))
+
+    assert blockdev_wipe.device_caps('/dev/loop0') == (4294966784, 0)
+    assert blockdev_wipe.device_caps('/dev/loop1') == (0, 0)
+
+
+def test_wipe_signatures(tmpdir):
+    image = tmpdir.join('disk.img')
+    image.write_binary(b'\xff' * (4 * MiB))
+
+    results = blockdev_wipe.wipe_all([str(image)], 'auto', MiB, 4)
+    assert results == {str(image): dict(method='signatures', size=4 * MiB)}
+
+    data = image.read_binary()
+    assert data[:MiB] == b'\0' * MiB
+    assert data[MiB:3 * MiB] == b'\xff' * (2 * MiB)
+    assert data[3 * MiB:] == b'\0' * MiB
+
+
+def test_wipe_all(tmpdir):
+    images = [tmpdir.join('disk%d.img' % i) for i in range(8)]
+    for image in images:
+        image.write_binary(b'\xff' * MiB)
+    devices = [str(image) for image in images]
+
+    results = blockdev_wipe.wipe_all(devices, 'signatures', 4096, 4, check_mode=True)
+    assert results == dict((d, dict(method='signatures')) for d in devices)
+    assert all(image.read_binary() == b'\xff' * MiB for image in images)
+
+    results = blockdev_wipe.wipe_all(devices + [str(tmpdir.join('missing'))], 'signatures', 4096, 4)
+    assert all(results[d] == dict(method='signatures', size=MiB) for d in devices)
+    assert 'error' in results[str(tmpdir.join('missing'))]
+    assert all(image.read_binary()[:4096] == b'\0' * 4096 for image in images)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+# Make the role's modules and module_utils importable the same way ansible
+# does when it runs them on the target.
+ROLE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(ROLE_DIR, "module_utils"))
+sys.path.insert(0, os.path.join(ROLE_DIR, "library"))
+
+import ansible.module_utils  # noqa: E402
+import inventory  # noqa: E402
+import size  # noqa: E402
+
+sys.modules['ansible.module_utils.inventory'] = inventory
+sys.modules['ansible.module_utils.size'] = size
+ansible.module_utils.inventory = inventory
+ansible.module_utils.size = size
+
+import blockdev_graph  # noqa: E402
+
+sys.modules['ansible.module_utils.blockdev_graph'] = blockdev_graph
+ansible.module_utils.blockdev_graph = blockdev_graph
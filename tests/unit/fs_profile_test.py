@@ -0,0 +1,163 @@
+
+import os
+import shlex
+
+import pytest
+
+import fs_profile
+
+
+MiB = 1024 ** 2
+GiB = 1024 ** 3
+TiB = 1024 ** 4
+
+
+@pytest.mark.parametrize('profile', ['database', 'streaming', 'small-files', 'scratch'])
+@pytest.mark.parametrize('fs_type', ['xfs', 'ext4'])
+def test_all_profiles(profile, fs_type):
+    mkfs, mount = fs_profile.resolve_profile(profile, fs_type, False)
+    assert 'noatime' in mount.split(',')
+    assert 'defaults' not in mount.split(',')
+
+
+def test_unknown_fs_type():
+    assert fs_profile.resolve_profile('database', 'swap', False, "", "defaults") == ("", "defaults")
+    assert fs_profile.resolve_profile('database', 'vfat', True, "-F 32", "ro") == ("-F 32", "ro")
+
+
+def test_rotational_geometry():
+    mkfs, mount = fs_profile.resolve_profile('database', 'xfs', True, size=100 * GiB)
+    assert mkfs == "-i size=512 -l size=128m -d agcount=4"
+    mkfs, mount = fs_profile.resolve_profile('database', 'xfs', False, size=100 * GiB)
+    assert mkfs == "-i size=512 -l size=128m -d agcount=32"
+    assert mount == "noatime,logbufs=8,logbsize=256k"
+
+    # unknown size, geometry is left to mkfs.xfs
+    mkfs, mount = fs_profile.resolve_profile('database', 'xfs', False)
+    assert mkfs == "-i size=512"
+
+
+def test_user_ag_geometry():
+    # mkfs.xfs refuses agcount together with agsize
+    mkfs, mount = fs_profile.resolve_profile('database', 'xfs', False, "-d agsize=1g", size=100 * GiB)
+    assert mkfs == "-i size=512 -l size=128m -d agsize=1g"
+
+    mkfs, mount = fs_profile.resolve_profile('database', 'xfs', True, "-d agcount=16", size=100 * GiB)
+    assert mkfs == "-i size=512 -l size=128m -d agcount=16"
+
+
+@pytest.mark.parametrize('size,rotational,log_size,expected', [
+    (0, False, 128 * MiB, (None, None)),
+    # a 128 MiB log needs AGs of at least 256 MiB
+    (1 * GiB, False, 128 * MiB, (4, 128 * MiB)),
+    (8 * GiB, False, 128 * MiB, (32, 128 * MiB)),
+    # the log does not fit into two AGs, let mkfs.xfs size it
+    (511 * MiB, False, 128 * MiB, (31, None)),
+    (512 * MiB, False, 128 * MiB, (2, 128 * MiB)),
+    # AGs are at least 16 MiB
+    (256 * MiB, False, 0, (16, None)),
+    (32 * MiB, False, 0, (2, None)),
+    (31 * MiB, False, 0, (None, None)),
+    # and at most 1 TiB
+    (4 * TiB - 1, True, 128 * MiB, (4, 128 * MiB)),
+    (4 * TiB, True, 128 * MiB, (5, 128 * MiB)),
+    (100 * TiB, True, 0, (101, None)),
+    (100 * TiB, False, 0, (101, None)),
+])
+def test_xfs_geometry(size, rotational, log_size, expected):
+    assert fs_profile.xfs_geometry(size, rotational, log_size) == expected
+    agcount, log = expected
+    if agcount:
+        assert fs_profile.XFS_AG_MIN <= size // agcount < fs_profile.XFS_AG_MAX
+        assert not log or log * 2 <= size // agcount
+
+
+@pytest.mark.parametrize('size', [64 * MiB, 300 * MiB, 1 * GiB, 5 * TiB])
+@pytest.mark.parametrize('rotational', [True, False])
+def test_xfs_profile_sizes(size, rotational):
+    mkfs, mount = fs_profile.resolve_profile('streaming', 'xfs', rotational, size=size)
+    opts = dict(opt.split('=') for opt in mkfs.replace('-l ', '').replace('-d ', '').replace(' ', ',').split(','))
+    agcount = int(opts['agcount'])
+    assert fs_profile.XFS_AG_MIN <= size // agcount < fs_profile.XFS_AG_MAX
+    if 'size' in opts:
+        assert 2 * 128 * MiB <= size // agcount
+
+
+def test_user_options_win():
+    mkfs, mount = fs_profile.resolve_profile('small-files', 'xfs', False,
+                                             "-i size=1024 -d agcount=8", "ro,logbsize=64k")
+    assert mkfs == "-i maxpct=50,size=1024 -d agcount=8"
+    assert mount == "noatime,logbufs=8,ro,logbsize=64k"
+
+    mkfs, mount = fs_profile.resolve_profile('streaming', 'ext4', True, "-i 8192", "defaults")
+    assert mkfs == "-G 64 -i 8192"
+    assert mount == "noatime,commit=60"
+
+
+def test_is_rotational(monkeypatch, tmpdir):
+    assert fs_profile.is_rotational('') is False
+    assert fs_profile.is_rotational('/dev/idonotexist') is False
+
+    tmpdir.mkdir('sdx').mkdir('queue').join('rotational').write('1\n')
+    monkeypatch.setattr(fs_profile, 'SYS_CLASS_BLOCK', str(tmpdir))
+    monkeypatch.setattr(os.path, 'exists', lambda p: True)
+    monkeypatch.setattr(os.path, 'realpath', lambda p: '/dev/sdx')
+    assert fs_profile.is_rotational('/dev/disk/by-id/foo') is True
+
+    monkeypatch.setattr(os.path, 'realpath', lambda p: '/dev/sdy')
+    assert fs_profile.is_rotational('/dev/disk/by-id/bar') is False
+
+
+def test_stripe_geometry():
+    mkfs, mount = fs_profile.resolve_profile(None, 'xfs', False, stripe_unit=256 * 1024, stripe_count=4)
+    assert (mkfs, mount) == ("-d su=256k,sw=4", "defaults")
+
+    mkfs, mount = fs_profile.resolve_profile('database', 'xfs', True, stripe_unit=256 * 1024, stripe_count=4,
+                                             size=100 * GiB)
+    assert mkfs == "-i size=512 -l size=128m -d agcount=4,su=256k,sw=4"
+
+    mkfs, mount = fs_profile.resolve_profile(None, 'ext4', False, stripe_unit=512 * 1024, stripe_count=3)
+    assert mkfs == "-E stride=128,stripe_width=384"
+
+    # user options win, no stripe options for non-striped devices
+    mkfs, mount = fs_profile.resolve_profile(None, 'ext4', False, "-E stride=64", stripe_unit=512 * 1024, stripe_count=3)
+    assert mkfs == "-E stripe_width=384,stride=64"
+    assert fs_profile.resolve_profile(None, 'xfs', False, "-f") == ("-f", "defaults")
+
+
+def test_merge_single_flags():
+    # mke2fs only uses the last -E, all the extended options have to be in one
+    mkfs, mount = fs_profile.resolve_profile(None, 'ext4', False, "-E lazy_itable_init=1 -L data",
+                                             stripe_unit=512 * 1024, stripe_count=3)
+    assert mkfs == "-E stride=128,stripe_width=384,lazy_itable_init=1 -L data"
+
+    assert fs_profile.merge_mkfs_options([], "-E a=1 -m 0 -E b=2", 'ext4') == "-E a=1,b=2 -m 0"
+    assert fs_profile.merge_mkfs_options([('-d', 'su', '64k')], "-d agcount=8 -L 'my data'", 'xfs') == \
+        "-d su=64k,agcount=8 -L 'my data'"
+    assert shlex.split(fs_profile.merge_mkfs_options([], "-O ^has_journal -O metadata_csum", 'ext4')) == \
+        ["-O", "^has_journal,metadata_csum"]
+    # ext4 -i takes a single value, not a suboption list
+    assert fs_profile.merge_mkfs_options([('-i', None, '65536')], "-m 1 -i 8192", 'ext4') == "-m 1 -i 8192"
+
+
+def test_merge_flags_without_values():
+    # suboptions without a value are merged too, the stripe alignment is kept
+    mkfs, mount = fs_profile.resolve_profile(None, 'ext4', False, "-E nodiscard",
+                                             stripe_unit=512 * 1024, stripe_count=3)
+    assert mkfs == "-E stride=128,stripe_width=384,nodiscard"
+
+
+def test_user_stripe_units():
+    # sunit/swidth set the stripe in 512 byte sectors, mkfs.xfs refuses them
+    # together with su/sw
+    mkfs, mount = fs_profile.resolve_profile(None, 'xfs', False, "-d sunit=256,swidth=768",
+                                             stripe_unit=256 * 1024, stripe_count=4)
+    assert mkfs == "-d sunit=256,swidth=768"
+
+    mkfs, mount = fs_profile.resolve_profile(None, 'xfs', False, "-d noalign -f",
+                                             stripe_unit=256 * 1024, stripe_count=4)
+    assert mkfs == "-d noalign -f"
+
+    mkfs, mount = fs_profile.resolve_profile('database', 'xfs', True, "-d swidth=1024,sunit=512",
+                                             stripe_unit=256 * 1024, stripe_count=4, size=100 * GiB)
+    assert mkfs == "-i size=512 -l size=128m -d agcount=4,swidth=1024,sunit=512"
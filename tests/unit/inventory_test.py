@@ -0,0 +1,143 @@
+
+import pytest
+
+import inventory
+
+
+blkid_output = """DEVNAME=/dev/sdx
+UUID=6c75fa75-e5ab-4a12-a567-c8aa0b4b60a5
+TYPE=xfs
+USAGE=filesystem
+
+DEVNAME=/dev/sdy
+PTUUID=0e9d4c3f
+PTTYPE=gpt
+"""
+
+
+def make_sysfs(tmpdir, devices):
+    for name, (majmin, holders) in devices.items():
+        devdir = tmpdir.join(name)
+        devdir.ensure("holders", dir=True)
+        devdir.ensure("slaves", dir=True)
+        devdir.join("dev").write(majmin + "\n")
+        devdir.join("size").write("2048\n")
+        for holder in holders:
+            devdir.join("holders").ensure(holder)
+
+
+@pytest.fixture
+def sysfs(tmpdir, monkeypatch):
+    make_sysfs(tmpdir.mkdir("block"), {"sdx": ("8:16", []), "sdy": ("8:32", ["dm-0"])})
+    udev = tmpdir.mkdir("udev")
+    udev.join("b8:16").write("")
+    udev.join("b8:32").write("")
+    monkeypatch.setattr(inventory, "SYS_CLASS_BLOCK", str(tmpdir.join("block")))
+    monkeypatch.setattr(inventory, "UDEV_DATA", str(udev))
+    monkeypatch.setattr(inventory, "SYMLINK_DIRS", [])
+    return tmpdir
+
+
+def test_probe_signatures():
+    calls = []
+
+    def run_cmd(args):
+        calls.append(args)
+        return (2, blkid_output, '')
+
+    signatures = inventory.probe_signatures(run_cmd, ["sdx", "sdy", "sdz"])
+    assert calls == [["blkid", "-p", "-o", "export", "/dev/sdx", "/dev/sdy", "/dev/sdz"]]
+    assert signatures["sdx"] == {"UUID": "6c75fa75-e5ab-4a12-a567-c8aa0b4b60a5",
+                                 "TYPE": "xfs", "USAGE": "filesystem"}
+    assert signatures["sdy"] == {"PTTYPE": "gpt"}
+    assert signatures["sdz"] == {}
+
+    assert inventory.probe_signatures(None, []) == {}
+
+
+def test_scan_reuses_unchanged(sysfs):
+    probed = []
+
+    def run_cmd(args):
+        probed.extend(args[4:])
+        return (0, blkid_output, '')
+
+    devices, rescanned = inventory.scan(run_cmd)
+    assert rescanned == ["sdx", "sdy"]
+    assert devices["sdy"]["holders"] == ["dm-0"]
+    assert devices["sdx"]["signature"]["TYPE"] == "xfs"
+
+    # nothing changed, nothing gets probed
+    del probed[:]
+    devices, rescanned = inventory.scan(run_cmd, dict(devices=devices), lvm_changed=False)
+    assert rescanned == []
+    assert probed == []
+    assert devices["sdx"]["signature"]["TYPE"] == "xfs"
+
+    # udev processed an event for sdx
+    sysfs.join("udev", "b8:16").setmtime(1)
+    devices, rescanned = inventory.scan(run_cmd, dict(devices=devices), lvm_changed=False)
+    assert rescanned == ["sdx"]
+    assert probed == ["/dev/sdx"]
+
+
+def test_get_inventory_cache(sysfs, monkeypatch):
+    scans = []
+
+    def run_cmd(args):
+        if args[0] == "blkid":
+            scans.append(args[4:])
+        return (0, blkid_output, '')
+
+    path = str(sysfs.join("run", "inventory.json"))
+    monkeypatch.setattr(inventory, "uevent_seqnum", lambda: 42)
+    monkeypatch.setattr(inventory, "lvm_seqnos", lambda run_cmd: {"vg": 3})
+
+    inv, rescanned = inventory.get_inventory(run_cmd, path)
+    assert rescanned == ["sdx", "sdy"]
+    assert inventory.load(path) == inv
+
+    inv, rescanned = inventory.get_inventory(run_cmd, path)
+    assert rescanned == []
+    assert len(scans) == 1
+
+    monkeypatch.setattr(inventory, "uevent_seqnum", lambda: 43)
+    inv, rescanned = inventory.get_inventory(run_cmd, path)
+    assert rescanned == []
+    assert inv["tags"]["uevent_seqnum"] == 43
+    assert inventory.load(path)["tags"]["uevent_seqnum"] == 43
+
+
+def test_lookup():
+    inv = dict(devices={"sdx": dict(signature={"LABEL": "data"}, symlinks=["/dev/disk/by-id/wwn-0x1"]),
+                        "dm-0": dict(signature=None, symlinks=["/dev/mapper/vg-lv"])})
+    assert inventory.lookup(inv, "sdx") == "sdx"
+    assert inventory.lookup(inv, "wwn-0x1") == "sdx"
+    assert inventory.lookup(inv, "vg-lv") == "dm-0"
+    assert inventory.lookup(inv, "LABEL=data") == "sdx"
+    assert inventory.lookup(inv, "LABEL=\"data\"") == "sdx"
+    assert inventory.lookup(inv, "PARTLABEL=data") is None
+    assert inventory.lookup(inv, "missing") is None
+
+
+def test_get_inventory_probe(sysfs, monkeypatch):
+    calls = []
+
+    def run_cmd(args):
+        calls.append(args)
+        return (0, blkid_output, '')
+
+    path = str(sysfs.join("run", "inventory.json"))
+    monkeypatch.setattr(inventory, "uevent_seqnum", lambda: 42)
+    monkeypatch.setattr(inventory, "lvm_seqnos", lambda run_cmd: {})
+    inventory.get_inventory(run_cmd, path)
+
+    # a new signature whose change event has not been processed yet
+    del calls[:]
+    inv, rescanned = inventory.get_inventory(lambda args: run_cmd(args) if args[0] != "blkid" else
+                                             (0, "DEVNAME=/dev/sdy\nUUID=new\nTYPE=ext4\n", ''),
+                                             path, probe=["sdy"])
+    assert calls[0] == ["udevadm", "settle"]
+    assert rescanned == ["sdy"]
+    assert inv["devices"]["sdy"]["signature"] == {"UUID": "new", "TYPE": "ext4"}
+    assert inventory.load(path)["devices"]["sdy"]["signature"]["UUID"] == "new"
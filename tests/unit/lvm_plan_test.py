@@ -0,0 +1,119 @@
+
+import pytest
+
+import lvm_plan
+
+
+MiB = 1024 ** 2
+GiB = 1024 ** 3
+EXTENT = 4 * MiB
+
+
+@pytest.mark.parametrize('spec,extents', [('10 GiB', 2560),
+                                          ('10g', 2560),
+                                          ('10.001 GiB', 2561),
+                                          ('1', 1),
+                                          ('50%', 500),
+                                          ('50%VG', 500),
+                                          ('50 %free', 200),
+                                          ('33.3%FREE', 133),
+                                          ('remaining', None)])
+def test_requested_extents(spec, extents):
+    assert lvm_plan.requested_extents(spec, EXTENT, 1000, 400) == extents
+
+
+@pytest.mark.parametrize('spec', ['120%', 'lots', '5 GidB'])
+def test_requested_extents_invalid(spec):
+    with pytest.raises(lvm_plan.PlanError):
+        lvm_plan.requested_extents(spec, EXTENT, 1000, 400)
+
+
+def test_place_balances():
+    pv_free = {'/dev/sda': 100, '/dev/sdb': 100, '/dev/sdc': 50}
+    placement = lvm_plan.place([('a', 60), ('b', 60), ('c', 40), ('d', 0)], pv_free)
+    assert placement == {'a': ['/dev/sda'], 'b': ['/dev/sdb'], 'c': ['/dev/sdc'], 'd': []}
+    assert pv_free == {'/dev/sda': 40, '/dev/sdb': 40, '/dev/sdc': 10}
+
+    # does not fit on a single PV, spread it
+    assert lvm_plan.place([('e', 70)], pv_free) == {'e': ['/dev/sda', '/dev/sdb']}
+    assert pv_free == {'/dev/sda': 0, '/dev/sdb': 10, '/dev/sdc': 10}
+
+
+def test_plan_volumes():
+    volumes = [dict(name='db', size='40%'),
+               dict(name='logs', size='1 GiB'),
+               dict(name='thin', size='100 GiB', type='thin'),
+               dict(name='gone', size='100 GiB', state='absent'),
+               dict(name='rest', size='remaining')]
+    lvs = {'logs': 128 * EXTENT}
+    pv_free = {'/dev/sda': 400, '/dev/sdb': 400}
+
+    planned, used = lvm_plan.plan_volumes(volumes, EXTENT, 1000, 800, lvs, pv_free)
+    assert sorted(planned) == ['db', 'logs', 'rest']
+    assert planned['db']['extents'] == 400
+    assert planned['db']['lvm'] == "%dk" % (400 * EXTENT // 1024)
+    assert planned['logs']['current'] == 128 * EXTENT
+    assert planned['logs']['extents'] == 256
+    assert planned['logs']['grow'] is True
+    assert (planned['logs']['current_size'], planned['logs']['size']) == ("512.0 MiB", "1.0 GiB")
+    assert planned['db']['grow'] is False
+    assert planned['rest']['extents'] == 800 - 400 - 128
+    assert used == 800
+    assert planned['db']['pvs'] == ['/dev/sda']
+    assert set(planned['rest']['pvs'] + planned['logs']['pvs']) == set(['/dev/sdb'])
+
+
+def test_plan_over_capacity():
+    volumes = [dict(name='a', size='2 GiB'), dict(name='b', size='2 GiB')]
+    with pytest.raises(lvm_plan.PlanError) as e:
+        lvm_plan.plan_volumes(volumes, EXTENT, 1000, 768, {}, {'/dev/sda': 768})
+    assert "need 4.0 GiB more space but only 3.0 GiB is free" in str(e.value)
+
+    volumes = [dict(name='a', size='remaining'), dict(name='b', size='remaining')]
+    with pytest.raises(lvm_plan.PlanError):
+        lvm_plan.plan_volumes(volumes, EXTENT, 1000, 768, {}, {'/dev/sda': 768})
+
+    volumes = [dict(name='a', size='3 GiB'), dict(name='b', size='remaining')]
+    with pytest.raises(lvm_plan.PlanError) as e:
+        lvm_plan.plan_volumes(volumes, EXTENT, 1000, 768, {}, {'/dev/sda': 768})
+    assert "No space remaining" in str(e.value)
+
+
+def test_plan_thin_pool():
+    # a new thin pool needs room for its metadata and spare metadata LVs
+    volumes = [dict(name='db', size='1 GiB'),
+               dict(name='thinpool', size='2 GiB', type='thinpool'),
+               dict(name='thin', size='100 GiB', type='thin')]
+    planned, used = lvm_plan.plan_volumes(volumes, EXTENT, 1000, 1000, {}, {'/dev/sda': 1000})
+    assert sorted(planned) == ['db', 'thinpool']
+    assert planned['thinpool']['extents'] == 512
+    assert planned['thinpool']['metadata_size'] == "4096k"
+    assert 'metadata_size' not in planned['db']
+    assert used == 256 + 512 + 2
+
+    # the default size is no longer taken before the thick volumes are planned
+    volumes = [dict(name='db', size='50%'),
+               dict(name='thinpool', size='90%FREE', type='thinpool')]
+    with pytest.raises(lvm_plan.PlanError):
+        lvm_plan.plan_volumes(volumes, EXTENT, 1000, 1000, {}, {'/dev/sda': 1000})
+
+    volumes = [dict(name='db', size='50%'),
+               dict(name='thinpool', size='remaining', type='thinpool', metadata_size='64 MiB')]
+    planned, used = lvm_plan.plan_volumes(volumes, EXTENT, 1000, 1000, {}, {'/dev/sda': 1000})
+    assert planned['thinpool']['extents'] == 500 - 2 * 16
+    assert planned['thinpool']['metadata_size'] == "65536k"
+    assert used == 1000
+
+    # existing thin pool only grows its data
+    volumes = [dict(name='thinpool', size='2 GiB', type='thinpool')]
+    planned, used = lvm_plan.plan_volumes(volumes, EXTENT, 1000, 800, {'thinpool': 1 * GiB},
+                                          {'/dev/sda': 800})
+    assert (planned['thinpool']['grow'], used) == (True, 256)
+
+
+@pytest.mark.parametrize('data_extents,metadata_size,extents', [(256, None, 1),
+                                                                 (2 ** 20, None, 1024),
+                                                                 (2 ** 30, None, 4096),
+                                                                 (256, '1 GiB', 256)])
+def test_thin_metadata_extents(data_extents, metadata_size, extents):
+    assert lvm_plan.thin_metadata_extents(data_extents, EXTENT, metadata_size) == extents
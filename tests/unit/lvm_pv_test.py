@@ -0,0 +1,48 @@
+
+import os
+import threading
+import pytest
+
+import lvm_pv
+
+
+def test_pv_command():
+    assert lvm_pv.pv_command('present', ['/dev/sdx', '/dev/sdy']) == \
+        ['pvcreate', '-y', '/dev/sdx', '/dev/sdy']
+    assert lvm_pv.pv_command('present', ['/dev/sdx'], '1m', '4m') == \
+        ['pvcreate', '-y', '--dataalignment', '1m', '--metadatasize', '4m', '/dev/sdx']
+    assert lvm_pv.pv_command('absent', ['/dev/sdx', '/dev/sdy'], '1m') == \
+        ['pvremove', '-y', '/dev/sdx', '/dev/sdy']
+
+
+def test_current_pvs(monkeypatch):
+    monkeypatch.setattr(os.path, 'realpath', lambda p: p.replace('/dev/mapper/mpatha', '/dev/dm-0'))
+
+    def run_cmd(args):
+        return (0, "  /dev/sdx\n  /dev/mapper/mpatha\n\n", '')
+    assert lvm_pv.current_pvs(run_cmd) == set(['/dev/sdx', '/dev/dm-0'])
+
+    with pytest.raises(RuntimeError):
+        lvm_pv.current_pvs(lambda args: (5, '', 'no lvm'))
+
+
+def test_wipe_all_parallel():
+    devices = ['/dev/sd%s' % c for c in 'abcdefgh']
+    barrier = threading.Event()
+    running = []
+
+    def run_cmd(args):
+        # the wipes only finish once all of them have started
+        running.append(args[2])
+        if len(running) == len(devices):
+            barrier.set()
+        assert barrier.wait(5)
+        if args[2] == '/dev/sdc':
+            return (1, '', 'device busy\n')
+        return (0, '', '')
+
+    errors = lvm_pv.wipe_all(run_cmd, devices, len(devices))
+    assert sorted(running) == devices
+    assert errors == {'/dev/sdc': 'device busy'}
+
+    assert lvm_pv.wipe_all(run_cmd, [], 4) == {}
@@ -0,0 +1,103 @@
+
+import pytest
+
+import mdraid
+
+
+KiB = 1024
+
+
+@pytest.mark.parametrize('level,disks,layout,expected', [('raid0', 4, 0, 4),
+                                                         ('raid1', 2, 0, 1),
+                                                         ('raid5', 4, 2, 3),
+                                                         ('raid6', 6, 2, 4),
+                                                         ('raid10', 4, 0x102, 2),
+                                                         ('raid10', 6, 0x103, 2),
+                                                         ('raid10', 4, 0x201, 2)])
+def test_data_disks(level, disks, layout, expected):
+    assert mdraid.data_disks(level, disks, layout) == expected
+
+
+def test_data_disks_invalid():
+    with pytest.raises(ValueError):
+        mdraid.data_disks('linear', 2)
+
+
+def test_geometry():
+    assert mdraid.geometry('/dev/md/data', 'raid6', 256 * KiB, 6) == \
+        dict(device='/dev/md/data', level='raid6', chunk_size=256 * KiB, data_disks=4,
+             stripe_width=1024 * KiB, pv_data_alignment='1024k')
+    assert mdraid.geometry('/dev/md/data', 'raid10', 512 * KiB, 4)['stripe_width'] == 1024 * KiB
+
+    mirror = mdraid.geometry('/dev/md/data', 'raid1', 512 * KiB, 2)
+    assert (mirror['chunk_size'], mirror['stripe_width'], mirror['pv_data_alignment']) == (0, 0, '')
+
+
+def test_read_geometry(tmpdir, monkeypatch):
+    md = tmpdir.mkdir('md127').mkdir('md')
+    for attr, value in [('level', 'raid5'), ('raid_disks', '5'), ('chunk_size', '524288'), ('layout', '2')]:
+        md.join(attr).write(value + '\n')
+    monkeypatch.setattr(mdraid, 'SYS_CLASS_BLOCK', str(tmpdir))
+    monkeypatch.setattr(mdraid.os.path, 'realpath', lambda p: '/dev/md127')
+
+    array = mdraid.read_geometry('/dev/md/data')
+    assert (array['level'], array['data_disks'], array['stripe_width']) == ('raid5', 4, 2048 * KiB)
+
+
+def test_create_command():
+    assert mdraid.create_command('/dev/md/data', 'raid5', ['/dev/sdb', '/dev/sdc', '/dev/sdd'], 256 * KiB) == \
+        ['mdadm', '--create', '/dev/md/data', '--run', '--level=raid5', '--raid-devices=3',
+         '--metadata=1.2', '--chunk=256K', '--bitmap=internal', '/dev/sdb', '/dev/sdc', '/dev/sdd']
+    assert mdraid.create_command('/dev/md/data', 'raid1', ['/dev/sdb', '/dev/sdc'], 256 * KiB, 'none') == \
+        ['mdadm', '--create', '/dev/md/data', '--run', '--level=raid1', '--raid-devices=2',
+         '--metadata=1.2', '--bitmap=none', '/dev/sdb', '/dev/sdc']
+    # bitmaps are not meaningful without redundancy
+    assert mdraid.create_command('/dev/md/data', 'raid0', ['/dev/sdb', '/dev/sdc'], 256 * KiB) == \
+        ['mdadm', '--create', '/dev/md/data', '--run', '--level=raid0', '--raid-devices=2',
+         '--metadata=1.2', '--chunk=256K', '/dev/sdb', '/dev/sdc']
+
+
+@pytest.mark.parametrize('level,expected', [('raid6', 'raid6'), ('6', 'raid6'), ('RAID10', 'raid10')])
+def test_normalize_level(level, expected):
+    assert mdraid.normalize_level(level) == expected
+
+
+examine_output = """MD_LEVEL=raid5
+MD_DEVICES=3
+MD_NAME=otherhost:data
+MD_UUID=4d3c2b1a:00000000:11111111:22222222
+MD_UPDATE_TIME=1539900000
+MD_DEV_UUID=aaaaaaaa:bbbbbbbb:cccccccc:dddddddd
+MD_EVENTS=42
+"""
+
+
+def test_examine():
+    def run_cmd(args):
+        if args[-1] == '/dev/sdb':
+            return (0, examine_output, '')
+        return (1, '', 'mdadm: No md superblock detected on /dev/sdc.')
+
+    superblock = mdraid.examine(run_cmd, '/dev/sdb')
+    assert (superblock['MD_LEVEL'], superblock['MD_NAME']) == ('raid5', 'otherhost:data')
+    assert mdraid.examine(run_cmd, '/dev/sdc') is None
+
+
+def test_superblock_mismatch():
+    devices = ['/dev/sdb', '/dev/sdc', '/dev/sdd']
+    superblock = dict(MD_LEVEL='raid5', MD_DEVICES='3', MD_NAME='otherhost:data', MD_UUID='1')
+    superblocks = dict((d, superblock) for d in devices)
+
+    # homehost does not matter
+    assert mdraid.superblock_mismatch('data', 'raid5', devices, superblocks) == []
+
+    errors = mdraid.superblock_mismatch('data', 'raid6', devices, superblocks)
+    assert errors == ["existing level is raid5"]
+
+    errors = mdraid.superblock_mismatch('data', 'raid5', devices + ['/dev/sde'],
+                                        dict(superblocks, **{'/dev/sde': None}))
+    assert errors == ["devices without the array superblock: /dev/sde", "existing array has 3 devices"]
+
+    errors = mdraid.superblock_mismatch('logs', 'raid5', devices,
+                                        dict(superblocks, **{'/dev/sdd': dict(superblock, MD_UUID='2')}))
+    assert errors == ["devices belong to different arrays", "devices belong to array 'otherhost:data'"]
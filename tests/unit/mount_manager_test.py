@@ -0,0 +1,93 @@
+
+import pytest
+
+import mount_manager
+
+
+fstab = ["# /etc/fstab\n",
+         "/dev/mapper/rhel-root / xfs defaults 0 0\n",
+         "UUID=1234 /opt/data xfs defaults 0 0\n",
+         "/dev/sdx /opt/old ext4 defaults 0 0\n",
+         "\n"]
+
+
+def entry(path, **kwargs):
+    mount = dict(src="/dev/mapper/vg-" + path.strip('/').replace('/', '_'), path=path, fstype="xfs")
+    mount.update(kwargs)
+    return mount_manager.normalize(mount)
+
+
+def test_normalize():
+    mount = mount_manager.normalize(dict(src="/dev/sdx", path="/opt/data/", fstype="xfs", passno="2"))
+    assert mount == dict(src="/dev/sdx", path="/opt/data", fstype="xfs", opts="defaults",
+                         dump=0, passno=2, state="mounted")
+
+    with pytest.raises(ValueError):
+        mount_manager.normalize(dict(src="/dev/sdx", path="/opt/data", fstype="xfs", state="gone"))
+
+
+def test_update_fstab():
+    mounts = [entry("/opt/data", src="UUID=1234", opts="noatime"),
+              entry("/opt/old", state="absent"),
+              entry("/opt/new dir")]
+    new_lines, old_lines = mount_manager.update_fstab(fstab, mounts)
+
+    assert new_lines == ["# /etc/fstab\n",
+                         "/dev/mapper/rhel-root / xfs defaults 0 0\n",
+                         "UUID=1234 /opt/data xfs noatime 0 0\n",
+                         "\n",
+                         "/dev/mapper/vg-opt_new\\040dir /opt/new\\040dir xfs defaults 0 0\n"]
+    assert old_lines == {"/opt/data": fstab[2], "/opt/old": fstab[3], "/opt/new dir": None}
+
+    # applying the same entries again changes nothing
+    assert mount_manager.update_fstab(new_lines, mounts)[0] == new_lines
+
+
+def test_plan_order():
+    mounts = [entry("/opt/a/b/c"), entry("/opt/a"), entry("/opt/a/b"),
+              entry("/srv/x/y", state="absent"), entry("/srv/x", state="unmounted")]
+    old_lines = dict((m['path'], None) for m in mounts)
+    umounts, mounts_ = mount_manager.plan_actions(mounts, old_lines, set(["/srv/x", "/srv/x/y"]))
+
+    assert [(m['path'], a) for m, a in umounts] == [("/srv/x/y", "umount"), ("/srv/x", "umount")]
+    assert [(m['path'], a) for m, a in mounts_] == [("/opt/a", "mount"), ("/opt/a/b", "mount"),
+                                                    ("/opt/a/b/c", "mount")]
+
+
+def test_plan_changed_entries():
+    mounted = set(["/opt/data", "/opt/logs", "/opt/same"])
+    mounts = [entry("/opt/data", opts="noatime"),
+              entry("/opt/logs", src="/dev/sdz"),
+              entry("/opt/same")]
+    old_lines = {"/opt/data": "/dev/mapper/vg-opt_data /opt/data xfs defaults 0 0\n",
+                 "/opt/logs": "/dev/mapper/vg-opt_logs /opt/logs xfs defaults 0 0\n",
+                 "/opt/same": mount_manager.fstab_line(mounts[2])}
+    umounts, mounts_ = mount_manager.plan_actions(mounts, old_lines, mounted)
+
+    assert [(m['path'], a) for m, a in umounts] == [("/opt/logs", "umount")]
+    assert [(m['path'], a) for m, a in mounts_] == [("/opt/data", "remount"), ("/opt/logs", "mount")]
+
+
+def test_current_mounts(tmpdir):
+    proc_mounts = tmpdir.join("mounts")
+    proc_mounts.write("/dev/sda1 / xfs rw 0 0\n/dev/sdb /opt/my\\040data xfs rw 0 0\n")
+    assert mount_manager.current_mounts(str(proc_mounts)) == set(["/", "/opt/my data"])
+
+
+def test_update_fstab_missing_newline():
+    lines = ["/dev/sda1 / xfs defaults 0 0"]
+    new_lines, old_lines = mount_manager.update_fstab(lines, [entry("/opt/data")])
+    assert new_lines == ["/dev/sda1 / xfs defaults 0 0\n", mount_manager.fstab_line(entry("/opt/data"))]
+
+
+def test_plan_fixed_options():
+    mounted = set(["/opt/db", "/opt/logs"])
+    mounts = [entry("/opt/db", opts="noatime,logbsize=256k"),
+              entry("/opt/logs", opts="noatime,nodiratime")]
+    old_lines = {"/opt/db": "/dev/mapper/vg-opt_db /opt/db xfs noatime,logbsize=64k 0 0\n",
+                 "/opt/logs": "/dev/mapper/vg-opt_logs /opt/logs xfs noatime 0 0\n"}
+    umounts, mounts_ = mount_manager.plan_actions(mounts, old_lines, mounted)
+
+    # logbsize cannot be changed by a remount
+    assert [(m['path'], a) for m, a in umounts] == [("/opt/db", "umount")]
+    assert [(m['path'], a) for m, a in mounts_] == [("/opt/db", "mount"), ("/opt/logs", "remount")]
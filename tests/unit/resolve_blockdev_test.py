@@ -85,3 +85,25 @@ def test_canonical_path(device, monkeypatch):
     canonical = canonical_paths[device]
     if canonical:
         assert resolve_blockdev.canonical_device(device) == canonical
+
+
+def test_md_name_from_kernel_dev(monkeypatch):
+    class Stat(object):
+        def __init__(self, rdev):
+            self.st_rdev = rdev
+
+    rdevs = {'/dev/md127': os.makedev(9, 127),
+             '/dev/md127p1': os.makedev(259, 3),
+             '/dev/md/home': os.makedev(9, 126),
+             '/dev/md/userdb': os.makedev(9, 127),
+             '/dev/md/userdb1': os.makedev(259, 3)}
+
+    monkeypatch.setattr(os.path, 'isdir', lambda p: True)
+    monkeypatch.setattr(os, 'listdir', lambda p: ['userdb1', 'userdb', 'home'])
+    monkeypatch.setattr(os, 'stat', lambda p: Stat(rdevs[p]))
+
+    assert resolve_blockdev.canonical_device('/dev/md127') == '/dev/md/userdb'
+    assert resolve_blockdev.canonical_device('/dev/md127p1') == '/dev/md/userdb1'
+
+    rdevs['/dev/md125'] = os.makedev(9, 125)
+    assert resolve_blockdev.canonical_device('/dev/md125') == '/dev/md125'